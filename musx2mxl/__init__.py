@@ -1,2 +1,13 @@
 __version__ = "0.2.9"
-from .musx2mxl import convert_file
\ No newline at end of file
+from .musx2mxl import convert_file, convert_bytes, sniff
+
+# the job and asyncio APIs (threading, asyncio) are imported on first access, so the command line stays light
+LAZY_EXPORTS = {"CancelToken": "jobs", "ConversionCancelled": "jobs", "ConversionJob": "jobs",
+                "convert_async": "aio", "convert_many": "aio"}
+
+
+def __getattr__(name):
+    if name in LAZY_EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(f".{LAZY_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
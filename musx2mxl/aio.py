@@ -0,0 +1,145 @@
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from musx2mxl.budget import run_with_budget
+from musx2mxl.diagnostics import Diagnostics
+from musx2mxl.jobs import CancelToken
+from musx2mxl.musx2mxl import convert_bytes
+
+DEFAULT_LIMIT = 4  # conversions running at the same time in convert_many
+
+
+def read_file(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def write_file(path, data):
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def convert_collecting(data, **options):
+    # returns the warnings with the content: a collector of the caller cannot reach another process
+    diagnostics = Diagnostics()
+    mxl = convert_bytes(data, diagnostics=diagnostics, **options)
+    return mxl, diagnostics
+
+
+def convert_with_budget(data, timeout, reproducible=False, measures=None, staves=None):
+    # runs in a worker of a process executor: the conversion itself runs in a child killed after timeout seconds
+    return run_with_budget(convert_collecting, (data,), timeout,
+                           kwargs={"reproducible": reproducible, "measures": measures, "staves": staves})
+
+
+async def convert_async(input_path, output_path=None, executor=None, timeout=None, reproducible=False,
+                        measures=None, staves=None, diagnostics=None):
+    """
+    Converts a Finale file without blocking the event loop. The files are read and written in a thread, the
+    conversion runs in the executor.
+
+    Args:
+        input_path: Path to the .musx file, or its content (bytes).
+        output_path (str): Path of the .mxl file (None: only return the content).
+        executor (Executor): Thread or process pool running the conversion (default: the default executor of the
+                             event loop).
+        timeout (float): Seconds after which the conversion is stopped and asyncio.TimeoutError is raised. A thread
+                         stops at the next measure; with a ProcessPoolExecutor the conversion runs in a child
+                         process of the worker, which is killed.
+        reproducible, measures, staves: See convert_file.
+        diagnostics (Diagnostics): Collects the warnings of the conversion (default: they are logged).
+
+    Returns:
+        bytes: Content of the .mxl file.
+    """
+    loop = asyncio.get_running_loop()
+    data = input_path if isinstance(input_path, (bytes, bytearray)) else \
+        await loop.run_in_executor(None, read_file, input_path)
+    cancel = None
+    if isinstance(executor, ProcessPoolExecutor):
+        # a CancelToken cannot reach another process
+        if timeout is not None:
+            func = functools.partial(convert_with_budget, bytes(data), timeout, reproducible=reproducible,
+                                     measures=measures, staves=staves)
+        else:
+            func = functools.partial(convert_collecting, bytes(data), reproducible=reproducible, measures=measures,
+                                     staves=staves)
+    else:
+        cancel = CancelToken()
+        func = functools.partial(convert_collecting, bytes(data), cancel=cancel, reproducible=reproducible,
+                                 measures=measures, staves=staves)
+    try:
+        mxl, warnings = await asyncio.wait_for(loop.run_in_executor(executor, func), timeout)
+    except BaseException:
+        # timed out, or the awaiting task was cancelled: stop a conversion running in a thread
+        if cancel:
+            cancel.cancel()
+        raise
+    if diagnostics is not None:
+        diagnostics.merge(warnings)
+    else:
+        warnings.log("" if isinstance(input_path, (bytes, bytearray)) else f"{input_path}: ")
+    if output_path is not None:
+        await loop.run_in_executor(None, write_file, output_path, mxl)
+    return mxl
+
+
+async def convert_many(items, executor=None, limit=DEFAULT_LIMIT, timeout=None, reproducible=False):
+    """
+    Converts many files, at most limit at the same time, and yields the results as they complete.
+
+    Items are taken from items only when a slot is free, so it can be a long (async) stream, e.g. of uploads.
+
+    Example:
+        async for item, mxl, error in convert_many(paths, ProcessPoolExecutor(4), limit=4, timeout=60):
+            ...
+
+    Args:
+        items: Iterable or async iterable of input paths, .musx contents (bytes) or (input, output path) tuples.
+        executor (Executor): See convert_async.
+        limit (int): Maximum number of conversions in flight.
+        timeout (float): Per-file timeout, see convert_async.
+        reproducible (bool): See convert_file.
+
+    Yields:
+        tuple: (item, .mxl content or None, exception or None)
+    """
+    if hasattr(items, "__aiter__"):
+        iterator = items.__aiter__()
+        next_item = iterator.__anext__
+    else:
+        iterator = iter(items)
+
+        async def next_item():
+            try:
+                return next(iterator)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    running = {}  # task -> item
+    exhausted = False
+    try:
+        while running or not exhausted:
+            while not exhausted and len(running) < limit:
+                try:
+                    item = await next_item()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                input_path, output_path = item if isinstance(item, tuple) else (item, None)
+                task = asyncio.ensure_future(convert_async(input_path, output_path, executor, timeout, reproducible))
+                running[task] = item
+            if not running:
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = running.pop(task)
+                error = task.exception()
+                yield item, (task.result() if error is None else None), error
+    finally:
+        # the consumer stopped early or was cancelled
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
@@ -0,0 +1,137 @@
+import calendar
+import gzip
+import io
+import posixpath
+import tarfile
+import tempfile
+import time
+import zipfile
+
+ZIP_EXTENSIONS = ('.zip',)
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ARCHIVE_EXTENSIONS = ZIP_EXTENSIONS + TAR_EXTENSIONS
+
+
+def is_archive_path(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def strip_archive_extension(path):
+    for extension in sorted(ARCHIVE_EXTENSIONS, key=len, reverse=True):
+        if path.lower().endswith(extension):
+            return path[:-len(extension)]
+    return path
+
+
+def safe_member_name(name):
+    """
+    Returns the normalized relative path of an archive member, or None if it would point outside the archive
+    (absolute path or '..').
+    """
+    name = posixpath.normpath(name.replace('\\', '/'))
+    if name.startswith('/') or name == '..' or name.startswith('../'):
+        return None
+    return name
+
+
+def iter_archive_members(archive_path, extension='.musx'):
+    """
+    Yields the name and content of all files with the given extension in a zip or tar archive,
+    reading the archive sequentially without extracting anything to disk.
+
+    Args:
+        archive_path (str): Path to a .zip or .tar (optionally compressed) archive.
+
+    Yields:
+        tuple: (member name, bytes)
+    """
+    if archive_path.lower().endswith(ZIP_EXTENSIONS):
+        with zipfile.ZipFile(archive_path, 'r') as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith(extension):
+                    yield info.filename, archive.read(info)
+    else:
+        # 'r|*' streams through the archive (and its compression) once, without seeking
+        with tarfile.open(archive_path, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith(extension):
+                    yield member.name, archive.extractfile(member).read()
+
+
+class ArchiveWriter:
+    """
+    Writes files into a new .zip or .tar (optionally compressed) archive.
+
+    With a date_time, the archive is reproducible: every member (and the gzip header) gets that time stamp, and the
+    members are written in the order of their names when the archive is closed, whatever the order they were written
+    in (e.g. by parallel conversions). They wait in a temporary file meanwhile.
+    """
+
+    def __init__(self, archive_path, date_time=None):
+        """
+        Args:
+            archive_path (str): Path of the .zip or .tar (optionally compressed) archive.
+            date_time (tuple): (year, month, day, hour, minute, second) of all members (default: the current time).
+        """
+        self.archive_path = archive_path
+        self.date_time = date_time
+        self.gzip = None
+        lower_path = archive_path.lower()
+        if lower_path.endswith(ZIP_EXTENSIONS):
+            self.zip = zipfile.ZipFile(archive_path, 'w')
+            self.tar = None
+        else:
+            if lower_path.endswith(('.tar.gz', '.tgz')):
+                mode = 'w:gz'
+            elif lower_path.endswith(('.tar.bz2', '.tbz2')):
+                mode = 'w:bz2'
+            elif lower_path.endswith(('.tar.xz', '.txz')):
+                mode = 'w:xz'
+            else:
+                mode = 'w'
+            self.zip = None
+            if mode == 'w:gz' and date_time:
+                # tarfile stamps the gzip header with the current time
+                self.gzip = gzip.GzipFile(archive_path, 'wb', mtime=calendar.timegm(date_time))
+                self.tar = tarfile.open(fileobj=self.gzip, mode='w')
+            else:
+                self.tar = tarfile.open(archive_path, mode)
+        self.spool = tempfile.TemporaryFile() if date_time else None
+        self.spooled = []  # (name, offset, size) of the members in spool
+
+    def write(self, name, data):
+        if self.spool is not None:
+            self.spooled.append((name, self.spool.tell(), len(data)))
+            self.spool.write(data)
+        else:
+            self.add(name, data)
+
+    def add(self, name, data):
+        if self.zip is not None:
+            # .mxl files are already compressed
+            if self.date_time:
+                name = zipfile.ZipInfo(name, self.date_time)
+            self.zip.writestr(name, data, compress_type=zipfile.ZIP_STORED)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = calendar.timegm(self.date_time) if self.date_time else int(time.time())
+            self.tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        try:
+            if self.spool is not None:
+                for name, offset, size in sorted(self.spooled):
+                    self.spool.seek(offset)
+                    self.add(name, self.spool.read(size))
+                self.spool.close()
+        finally:
+            (self.zip or self.tar).close()
+            if self.gzip:
+                self.gzip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,104 @@
+import json
+import multiprocessing
+import os
+import time
+
+POLL_INTERVAL = 0.05  # seconds between two checks of a running conversion
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def read_rss(pid):
+    """
+    Returns the resident set size of a process in bytes, or None when it cannot be determined (no /proc).
+    """
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _run_child(conn, func, args, kwargs):
+    try:
+        conn.send((func(*args, **kwargs), None))
+    except BaseException as e:
+        conn.send((None, f"{e}"))
+    finally:
+        conn.close()
+
+
+def run_with_budget(func, args=(), timeout=None, max_memory=None, kwargs=None):
+    """
+    Runs func(*args, **kwargs) in a child process that is killed when it exceeds its budget.
+    Returns the result of func, which must be picklable.
+
+    Args:
+        func: Module level function to run.
+        args (tuple): Arguments for func.
+        timeout (float): Wall-clock budget in seconds (None for no limit).
+        max_memory (int): Resident memory budget in bytes (None for no limit). Only enforced where /proc is available.
+        kwargs (dict): Keyword arguments for func.
+
+    Raises:
+        BudgetExceeded: When the child was killed, with the reason as message.
+        Exception: When func raised an exception, with the message of that exception.
+    """
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_run_child, args=(child_conn, func, args, kwargs or {}), daemon=True)
+    start = time.monotonic()
+    process.start()
+    child_conn.close()
+
+    reason = None
+    while process.is_alive() and not parent_conn.poll():
+        elapsed = time.monotonic() - start
+        if timeout is not None and elapsed > timeout:
+            reason = f"timeout: exceeded {timeout:g} s"
+            break
+        if max_memory is not None:
+            rss = read_rss(process.pid)
+            if rss is not None and rss > max_memory:
+                reason = f"memory: resident size {rss // 2 ** 20} MB exceeded {max_memory // 2 ** 20} MB"
+                break
+        process.join(POLL_INTERVAL)
+
+    if reason:
+        process.kill()
+        process.join()
+        raise BudgetExceeded(reason)
+
+    try:
+        result, error = parent_conn.recv()
+    except EOFError:
+        process.join()
+        result, error = None, f"worker died with exit code {process.exitcode}"
+    finally:
+        parent_conn.close()
+    process.join()
+    if error:
+        raise Exception(error)
+    return result
+
+
+def load_quarantine(quarantine_path):
+    """
+    Returns the set of absolute input paths listed in a quarantine file (JSON lines with 'path' and 'reason'), so
+    a file is recognized however the directory was given (relative paths of older files are taken as relative to
+    the working directory).
+    """
+    if not quarantine_path or not os.path.isfile(quarantine_path):
+        return set()
+    with open(quarantine_path, encoding="utf-8") as file:
+        return {os.path.abspath(json.loads(line)["path"]) for line in file if line.strip()}
+
+
+def is_quarantined(quarantined, input_path):
+    return os.path.abspath(input_path) in quarantined
+
+
+def add_to_quarantine(quarantine_path, input_path, reason):
+    with open(quarantine_path, "a", encoding="utf-8") as file:
+        file.write(json.dumps({"path": os.path.abspath(input_path), "reason": reason}) + "\n")
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+
+import musx2mxl
+
+CACHE_ENV = "MUSX2MXL_CACHE"
+MEASURE_CACHE_FILE = "measures.sqlite"
+MEASURE_CACHE_MAX_ENTRIES = 200000  # measures kept, about 1 KB each
+MEASURE_CACHE_MAX_AGE = 30 * 24 * 3600  # seconds a measure is kept without being used
+
+
+def default_cache_dir():
+    """
+    Returns the cache directory: $MUSX2MXL_CACHE, or musx2mxl in $XDG_CACHE_HOME or ~/.cache.
+    """
+    if os.environ.get(CACHE_ENV):
+        return os.environ[CACHE_ENV]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "musx2mxl")
+
+
+class ResultCache:
+    """
+    Content-addressed cache of converted files.
+
+    A result is stored under a key hashing score.dat and NotationMetadata.xml of the .musx file, the musx2mxl version
+    and the output options (and the time stamp of reproducible output), so identical scores anywhere in a library
+    share one entry. The key of a path is remembered, per options, with the modification time and size of the file;
+    as long as they do not change, the file is not read again. Cached files are never modified: hits are hardlinked (or copied) to the output path.
+
+    Layout of the cache directory:
+        objects/<ab>/<key>.mxl   converted files
+        paths/<ab>/<hash>.json   key, mtime and size of an input path
+    """
+
+    def __init__(self, cache_dir=None, options=None, date_time=None):
+        """
+        Args:
+            cache_dir (str): Cache directory (default: default_cache_dir()).
+            options (dict): Options changing the output of a conversion; part of every key.
+            date_time: Function date_time(input_path) returning the time stamp written to the output of a file
+                       (see source_date_time), part of its key.
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.salt = json.dumps({"version": musx2mxl.__version__, "options": options or {}},
+                               sort_keys=True).encode("utf-8")
+        self.date_time = date_time
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, input_path):
+        """
+        Returns the cache key of a .musx file, or None when it is no readable .musx file.
+        """
+        stat = os.stat(input_path)
+        path_hash = hashlib.sha1(self.salt + os.path.abspath(input_path).encode("utf-8")).hexdigest()
+        index_path = self._path("paths", path_hash, ".json")
+        try:
+            with open(index_path, encoding="utf-8") as file:
+                entry = json.load(file)
+            if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                return entry["key"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        digest = hashlib.sha256(self.salt)
+        try:
+            with zipfile.ZipFile(input_path, 'r') as zip_ref:
+                for name in ('score.dat', 'NotationMetadata.xml'):
+                    data = zip_ref.read(name)
+                    digest.update(len(data).to_bytes(8, "big"))
+                    digest.update(data)
+            if self.date_time:
+                digest.update(repr(tuple(self.date_time(input_path))).encode("utf-8"))
+        except (zipfile.BadZipFile, KeyError, OSError):
+            return None
+        key = digest.hexdigest()
+        entry = {"path": os.path.abspath(input_path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "key": key}
+        self._write_atomic(index_path, json.dumps(entry).encode("utf-8"))
+        return key
+
+    def read(self, key):
+        """
+        Returns the cached .mxl content of a key, or None.
+        """
+        try:
+            with open(self._path("objects", key, ".mxl"), "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def copy_to(self, key, output_path):
+        """
+        Hardlinks (or copies, across file systems) the cached .mxl file of a key to output_path.
+
+        Returns:
+            bool: False when the key is not cached.
+        """
+        object_path = self._path("objects", key, ".mxl")
+        if not os.path.exists(object_path):
+            self.misses += 1
+            return False
+        if os.path.lexists(output_path):
+            os.remove(output_path)  # never write through an existing link into the cache
+        try:
+            os.link(object_path, output_path)
+        except OSError:
+            shutil.copyfile(object_path, output_path)
+        self.hits += 1
+        return True
+
+    def put(self, key, data=None, path=None):
+        """
+        Stores the .mxl content (data) or a copy of the .mxl file at path under a key.
+        """
+        if data is None:
+            with open(path, "rb") as file:
+                data = file.read()
+        self._write_atomic(self._path("objects", key, ".mxl"), data)
+
+    def _path(self, kind, name, extension):
+        return os.path.join(self.cache_dir, kind, name[:2], name + extension)
+
+    def _write_atomic(self, path, data):
+        # concurrent writers of the same key write the same content, the last rename wins
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+class MeasureCache:
+    """
+    Persistent cache of converted <measure> elements, used by convert_tree to convert only the measures that
+    changed since an earlier conversion of the score (or of another score sharing measures).
+
+    Entries are keyed by converter.measure_cache_key and hold the serialized measure and the state (key, time,
+    clef, ...) after it, in an SQLite database shared by all scores. Entries not used for max_age seconds are
+    removed, and the least recently used ones beyond max_entries, when the cache is closed.
+    """
+
+    def __init__(self, path=None, max_entries=MEASURE_CACHE_MAX_ENTRIES, max_age=MEASURE_CACHE_MAX_AGE):
+        """
+        Args:
+            path (str): SQLite database (default: measures.sqlite in default_cache_dir()).
+            max_entries (int): Number of measures kept.
+            max_age (float): Seconds a measure is kept without being used.
+        """
+        self.path = path or os.path.join(default_cache_dir(), MEASURE_CACHE_FILE)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS measures (key TEXT PRIMARY KEY, measure BLOB NOT NULL, "
+                                "state TEXT NOT NULL, last_used INTEGER NOT NULL DEFAULT 0)")
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(measures)")]
+        if "last_used" not in columns:
+            # database of an earlier version: its entries count as unused since the epoch
+            self.connection.execute("ALTER TABLE measures ADD COLUMN last_used INTEGER NOT NULL DEFAULT 0")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS measures_last_used ON measures (last_used)")
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.pending = []  # new entries, written on close
+        self.used = []  # keys of the hits, their last use is updated on close
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns (serialized measure, state) of a key, or None.
+        """
+        row = self.connection.execute("SELECT measure, state FROM measures WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used.append(key)
+        return row[0], json.loads(row[1])
+
+    def put(self, key, measure, state):
+        self.pending.append((key, measure, json.dumps(state)))
+
+    def close(self):
+        # one short transaction, so concurrent conversions sharing the database rarely wait for each other
+        now = int(time.time())
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO measures (key, measure, state, last_used) "
+                                        "VALUES (?, ?, ?, ?)", [entry + (now,) for entry in self.pending])
+            self.connection.executemany("UPDATE measures SET last_used = ? WHERE key = ?",
+                                        [(now, key) for key in self.used])
+            self.prune(now)
+        self.pending = []
+        self.used = []
+        self.connection.close()
+
+    def prune(self, now):
+        self.connection.execute("DELETE FROM measures WHERE last_used < ?", (now - self.max_age,))
+        excess = self.connection.execute("SELECT COUNT(*) FROM measures").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.connection.execute("DELETE FROM measures WHERE key IN "
+                                    "(SELECT key FROM measures ORDER BY last_used LIMIT ?)", (excess,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
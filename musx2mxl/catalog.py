@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_DATABASE = "musx2mxl-catalog.sqlite"
+BATCH_SIZE = 200  # rows per transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    title TEXT,
+    subtitle TEXT,
+    composer TEXT,
+    file_info TEXT,       -- all fields of fileInfo in NotationMetadata.xml as JSON
+    staves INTEGER,
+    measures INTEGER,
+    entries INTEGER,
+    cost INTEGER,         -- relative conversion cost, see metadata.estimate_cost
+    error TEXT,           -- why the file could not be scanned, NULL if it was
+    scanned_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS instruments (
+    path TEXT NOT NULL REFERENCES scores(path) ON DELETE CASCADE,
+    staff INTEGER NOT NULL,  -- position of the staff in the score, from 1
+    uuid TEXT,
+    name TEXT,               -- NULL when the UUID is not in instruments.json
+    category TEXT,
+    PRIMARY KEY (path, staff)
+);
+CREATE INDEX IF NOT EXISTS instruments_name ON instruments(name);
+CREATE INDEX IF NOT EXISTS scores_composer ON scores(composer);
+"""
+
+
+def open_catalog(database):
+    connection = sqlite3.connect(database)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def scan_file(input_path):
+    """
+    Extracts the catalog fields of a .musx file. Runs in a worker process.
+
+    Returns:
+        dict: Catalog row with the instruments, or with error when the file cannot be read.
+    """
+    from musx2mxl.metadata import estimate_cost, read_file_info, read_musx, scan_score
+    stat = os.stat(input_path)
+    row = {"path": input_path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    try:
+        enigmaxml, metadata = read_musx(input_path)
+        file_info = read_file_info(metadata)
+        score = scan_score(enigmaxml)
+    except Exception as e:
+        row["error"] = str(e) or type(e).__name__
+        return row
+    row.update(title=file_info.get("title"), subtitle=file_info.get("subtitle"), composer=file_info.get("composer"),
+               file_info=json.dumps(file_info), staves=score["staves"], measures=score["measures"],
+               entries=score["entries"], cost=estimate_cost(score), instruments=score["instruments"])
+    return row
+
+
+def store(connection, row):
+    instruments = row.pop("instruments", [])
+    row = dict({"title": None, "subtitle": None, "composer": None, "file_info": None, "staves": None,
+                "measures": None, "entries": None, "cost": None, "error": None}, **row, scanned_at=time.time())
+    connection.execute("DELETE FROM scores WHERE path = ?", (row["path"],))
+    connection.execute(f"INSERT INTO scores ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                       tuple(row.values()))
+    connection.executemany("INSERT INTO instruments (path, staff, uuid, name, category) VALUES (?, ?, ?, ?, ?)",
+                           [(row["path"], staff, instrument["uuid"], instrument["name"], instrument["category"])
+                            for staff, instrument in enumerate(instruments, 1)])
+
+
+def update_catalog(directory, database=DEFAULT_DATABASE, recursive=False, jobs=None):
+    """
+    Adds the .musx files of a directory to a catalog database. Files whose size and modification time did not change
+    since the last run are not read again; files that disappeared are removed from the catalog.
+
+    Args:
+        directory (str): Directory with .musx files.
+        database (str): Path of the SQLite database (created if missing).
+        recursive (bool): Include subdirectories.
+        jobs (int): Number of worker processes reading the files (default: number of CPUs).
+
+    Returns:
+        dict: Number of scanned, unchanged, removed and failed files.
+    """
+    from musx2mxl.musx2mxl import find_musx_files
+    connection = open_catalog(database)
+    root = os.path.abspath(directory)
+    known = {path: (size, mtime_ns) for path, size, mtime_ns in
+             connection.execute("SELECT path, size, mtime_ns FROM scores WHERE path LIKE ? ESCAPE '\\'",
+                                (escape_like(os.path.join(root, '')) + '%',))}
+    counts = {"scanned": 0, "unchanged": 0, "removed": 0, "failed": 0}
+
+    changed = []
+    for input_path in find_musx_files(root, recursive):
+        stat = os.stat(input_path)
+        if known.pop(input_path, None) == (stat.st_size, stat.st_mtime_ns):
+            counts["unchanged"] += 1
+        else:
+            changed.append(input_path)
+    if not recursive:
+        # files in subdirectories are only removed by a recursive run
+        known = {path: value for path, value in known.items() if os.path.dirname(path) == root}
+    with connection:
+        connection.executemany("DELETE FROM scores WHERE path = ?", [(path,) for path in known])
+    counts["removed"] = len(known)
+
+    try:
+        with ProcessPoolExecutor(jobs) as executor:
+            # workers read and parse in parallel, this process is the only writer of the database
+            for index, row in enumerate(executor.map(scan_file, changed, chunksize=8), 1):
+                if row.get("error"):
+                    counts["failed"] += 1
+                    print(f"Error scanning {row['path']}: {row['error']}")
+                store(connection, row)
+                counts["scanned"] += 1
+                if index % BATCH_SIZE == 0:
+                    connection.commit()
+                    print(f"Scanned {index} of {len(changed)} files")
+    finally:
+        connection.commit()
+        connection.close()
+    return counts
+
+
+def escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def main(argv=None):
+    """
+    Entry point of 'musx2mxl catalog'.
+    """
+    parser = argparse.ArgumentParser(prog="musx2mxl catalog",
+                                     description="Index the title, composer, instruments and size of Finale .musx files in an SQLite database, without converting them.")
+    parser.add_argument("directory", help="Directory containing the .musx files.")
+    parser.add_argument("--db", default=DEFAULT_DATABASE, help=f"SQLite database to create or update (default: {DEFAULT_DATABASE}).")
+    parser.add_argument("--recursive", action="store_true", help="Scan subdirectories recursively.")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: number of CPUs).")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"Error: {args.directory} is not a directory.")
+        return 1
+    counts = update_catalog(args.directory, args.db, args.recursive, args.jobs)
+    print(f"Catalog {args.db}: " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+    return 0
@@ -1,11 +1,13 @@
+import hashlib
 import math
 from datetime import date
 from io import BytesIO
-from lxml.etree import Element, SubElement, parse, ElementTree, XMLSyntaxError
+from lxml.etree import Element, SubElement, parse, ElementTree, XMLSyntaxError, fromstring, tostring
 from musx2mxl.helper import calculate_mode_and_key_fifths, calculate_type_and_dots, calculate_step_alter_and_octave, \
     translate_clef_sign, translate_bar_style, replace_music_symbols, remove_styling_tags, translate_dynamics, \
     count_tuplet, translate_articualtion, translate_tempo_marks, calculate_transpose, translate_instrument, \
     reorder_children, find_nth_syllabic, translate_chord_suffix, translate_chord_step
+from musx2mxl.diagnostics import warn
 import musx2mxl
 
 ns = {"f": "http://www.makemusic.com/2012/finale"}
@@ -20,11 +22,37 @@ BRACKET_STRAIGHT_HOOKS = '2'
 PIANO_BRACE = '3'
 BRACKET_CURVED_HOOKS = '6'
 DESK_BRACKET = '8'
+UNSET = object()  # initial state that differs from every value, so the first measure emits it
+MEASURE_ELEMENTS = ('measSpec', 'measExprAssign', 'smartShapeMeasMark', 'textRepeatAssign')  # keyed by @cmper
+MEASURE_STAFF_ELEMENTS = ('gfhold', 'chordAssign')  # keyed by @cmper2 (measure) and @cmper1 (staff)
 
 
-def convert_from_stream(input_stream, metadata_stream, output_stream):
+def convert_from_stream(input_stream, metadata_stream, output_stream, progress=None, cancel=None, encoding_date=None,
+                        measures=None, staves=None, measure_cache=None):
     """
-    Convert data from an input stream and return the converted data as a bytes object.
+    Convert data from an input stream and write the converted data to the output stream.
+    Progress, cancel, encoding_date, measures, staves and measure_cache are passed to convert_tree.
+
+    Returns:
+        ElementTree: The MusicXML tree.
+    """
+    if progress: progress('parse', 0, 1)
+    tree, meta_tree = parse_trees(input_stream, metadata_stream)
+
+    output_tree = convert_tree(tree, meta_tree, progress, cancel, encoding_date, measures, staves, measure_cache)
+
+    if cancel: cancel.raise_if_cancelled()
+    if progress: progress('serialize', 0, 1)
+    write_tree(output_tree, output_stream)
+    return output_tree
+
+
+def parse_trees(input_stream, metadata_stream):
+    """
+    Parses the enigmaxml and NotationMetadata.xml streams.
+
+    Returns:
+        tuple: (enigmaxml tree, metadata tree)
     """
     tree = parse(input_stream)
 
@@ -34,9 +62,13 @@ def convert_from_stream(input_stream, metadata_stream, output_stream):
         # try to solve wrong encoding
         metadata_stream = BytesIO(metadata_stream.getvalue().decode("latin1").encode("utf-8"))
         meta_tree = parse(metadata_stream)
+    return tree, meta_tree
 
-    output_tree = convert_tree(tree, meta_tree)
 
+def write_tree(output_tree, output_stream):
+    """
+    Serializes a MusicXML tree with its doctype.
+    """
     doctype = '-//Recordare//DTD MusicXML 4.0 Partwise//EN'
     dtd_url = 'http://www.musicxml.org/dtds/partwise.dtd'
 
@@ -86,7 +118,7 @@ def lookup_meas_expressions(root, meas_spec_cmper: str):
             expression_text = root.find(f"f:texts/f:expression[@number='{textID}']", namespaces=ns).text if root.find(
                 f"f:texts/f:expression[@number='{textID}']", namespaces=ns) is not None else None
         else:
-            print(f'textBlock with cmper {textIDKey} not found.')
+            warn('text-block-not-found', f'textBlock with cmper {textIDKey} not found.', textIDKey)
 
         if expression_text:
             # todo what if expression_text is not found
@@ -130,7 +162,7 @@ def lookup_txt_repeats(root, meas_spec_cmper):
                     {'topStaffOnly': topStaffOnly, 'staffList': staffList, 'horzPos': horzPos, 'vertPos': vertPos,
                      'rptText': rptText})
             else:
-                print(f'textRepeatText with cmper {repnum} not found.')
+                warn('text-repeat-not-found', f'textRepeatText with cmper {repnum} not found.', repnum)
 
     return txt_repeats
 
@@ -145,7 +177,7 @@ def lookup_meas_smart_shapes(root, meas_spec_cmper):
         shapeNum = smartShapeMeasMark.find('f:shapeNum', namespaces=ns).text
         smartShape = root.find(f"f:others/f:smartShape[@cmper = '{shapeNum}']", namespaces=ns)
         if smartShape is None:
-            print(f'smartShape with cmper {shapeNum} not found')
+            warn('smart-shape-not-found', f'smartShape with cmper {shapeNum} not found.', shapeNum)
         else:
             shapeType = smartShape.find("f:shapeType", namespaces=ns).text if smartShape.find("f:shapeType",
                                                                                               namespaces=ns) is not None else None
@@ -174,7 +206,7 @@ def lookup_block_text(root, id):
     if text:
         return replace_music_symbols(remove_styling_tags(text))
     else:
-        print(f"blockText with number {textID} not found.")
+        warn('block-text-not-found', f'blockText with number {textID} not found.', textID)
         return ''
 
 
@@ -270,13 +302,170 @@ def get_piano_brace_staff_group(staff_spec_cmper, staff_groups):
     return None
 
 
-def convert_tree(tree, meta_tree):
+def lookup_parts(root):
+    """
+    Returns the parts convert_tree creates, as dicts with id, name and staves (staff numbers from 1, in score order;
+    several staves for a piano brace).
+    """
+    staff_groups = lookup_staff_groups(root)
+    staff_specs = root.xpath("/f:finale/f:others/f:staffSpec[@cmper != '32767']", namespaces=ns)
+    parts = {}  # staff cmper of the part -> part
+    for staff_spec in staff_specs:
+        staff_spec_cmper = staff_spec.get("cmper")
+        piano_staff_group = get_piano_brace_staff_group(staff_spec_cmper, staff_groups)
+        if piano_staff_group is None or piano_staff_group['startInst'] == staff_spec_cmper:
+            fullName_ = staff_spec.find('f:fullName', namespaces=ns)
+            if fullName_ is not None:
+                name = lookup_block_text(root, fullName_.text)
+            else:
+                name = find_staff_group_name('fullName', staff_spec_cmper, staff_groups)
+            parts[staff_spec_cmper] = {'id': f"P{len(parts) + 1}", 'name': name or '', 'staves': []}
+    for staff_number, staff_spec in enumerate(staff_specs, 1):
+        staff_spec_cmper = staff_spec.get("cmper")
+        piano_staff_group = get_piano_brace_staff_group(staff_spec_cmper, staff_groups)
+        parts[piano_staff_group['startInst'] if piano_staff_group else staff_spec_cmper]['staves'].append(staff_number)
+    return list(parts.values())
+
+
+def measure_digests(root):
+    """
+    Fingerprints the Finale data every measure is converted from, for the measure cache of convert_tree.
+
+    The digest of a measure covers its measSpec, expressions, smart shape and text repeat assignments, and the
+    gfholds, chords, frames, entries and entry details of all staves in the measure, with the smart shapes these
+    assignments and entry details refer to. Everything else not tied to a measure (staves, clefs, text, expression
+    and articulation definitions, options, ...) goes into every digest.
+
+    Returns:
+        dict: Hex digest per measure cmper.
+    """
+    by_measure = {}  # measure cmper -> serialized elements
+    gfholds = {}  # measure cmper -> gfhold elements
+    frame_specs = {}  # frame cmper -> frameSpec elements
+    entries = {}  # entnum -> entry element
+    entry_details = {}  # entnum -> serialized details
+    first_clefIDs = {}  # staff cmper -> clef of the first gfhold with one, used by empty measures
+    smart_shapes = {}  # smartShape cmper -> serialized smartShape
+    measure_shapes = {}  # measure cmper -> shapeNum of its smartShapeMeasMarks
+    entry_shapes = {}  # entnum -> shapeNum of its smartShapeEntryMarks
+    common = hashlib.sha256(musx2mxl.__version__.encode("utf-8"))
+    for section in root:
+        for element in section:
+            if not isinstance(element.tag, str):
+                continue  # comments
+            name = element.tag.split('}')[-1]
+            if name in MEASURE_ELEMENTS:
+                by_measure.setdefault(element.get("cmper"), []).append(tostring(element, with_tail=False))
+                if name == 'smartShapeMeasMark':
+                    measure_shapes.setdefault(element.get("cmper"), []).append(
+                        element.findtext("f:shapeNum", namespaces=ns))
+            elif name == 'smartShape':
+                # only in the digests of the measures and entries using it: adding a slur or hairpin is a local edit
+                smart_shapes[element.get("cmper")] = tostring(element, with_tail=False)
+            elif name in MEASURE_STAFF_ELEMENTS:
+                by_measure.setdefault(element.get("cmper2"), []).append(tostring(element, with_tail=False))
+                if name == 'gfhold':
+                    gfholds.setdefault(element.get("cmper2"), []).append(element)
+                    clefID = element.find("f:clefID", namespaces=ns)
+                    if clefID is not None:
+                        first_clefIDs.setdefault(element.get("cmper1"), clefID.text)
+            elif name == 'frameSpec':
+                frame_specs.setdefault(element.get("cmper"), []).append(element)
+            elif name == 'entry':
+                entries[element.get("entnum")] = element
+            elif element.get("entnum") is not None:
+                entry_details.setdefault(element.get("entnum"), []).append(tostring(element, with_tail=False))
+                if name == 'smartShapeEntryMark':
+                    entry_shapes.setdefault(element.get("entnum"), []).append(
+                        element.findtext("f:shapeNum", namespaces=ns))
+            else:
+                common.update(tostring(element, with_tail=False))
+    common.update(repr(sorted(first_clefIDs.items())).encode("utf-8"))
+
+    digests = {}
+    for meas_cmper, serialized in by_measure.items():
+        digest = common.copy()
+        for data in serialized:
+            digest.update(data)
+        for shape_num in measure_shapes.get(meas_cmper, []):
+            digest.update(smart_shapes.get(shape_num, b"missing smartShape"))
+        for gfhold in gfholds.get(meas_cmper, []):
+            for frame_num in range(1, 5):
+                frame = gfhold.find(f"f:frame{frame_num}", namespaces=ns)
+                for frame_spec in frame_specs.get(frame.text if frame is not None else None, []):
+                    digest.update(tostring(frame_spec, with_tail=False))
+                    # same walk as process_frame_entries
+                    end_entnum = frame_spec.findtext("f:endEntry", namespaces=ns)
+                    current_entnum = frame_spec.findtext("f:startEntry", namespaces=ns)
+                    visited = set()
+                    while current_entnum and current_entnum not in visited and current_entnum in entries:
+                        visited.add(current_entnum)
+                        digest.update(tostring(entries[current_entnum], with_tail=False))
+                        for data in entry_details.get(current_entnum, []):
+                            digest.update(data)
+                        for shape_num in entry_shapes.get(current_entnum, []):
+                            digest.update(smart_shapes.get(shape_num, b"missing smartShape"))
+                        if current_entnum == end_entnum:
+                            break
+                        current_entnum = entries[current_entnum].get("next")
+        digests[meas_cmper] = digest.hexdigest()
+    return digests
+
+
+def measure_cache_key(measure_digest, *context):
+    """
+    Returns the measure cache key of a measure digest and the conversion context (part, position in the score and
+    the key, time and clef in effect).
+    """
+    context = tuple('unset' if value is UNSET else value for value in context)
+    return hashlib.sha256(f"{measure_digest}:{context!r}".encode("utf-8")).hexdigest()
+
+
+def pack_measure_state(key, beats, divbeat, clefID, ending_cnt, handle_tempo):
+    """
+    Returns the state after a measure as JSON-compatible list; the clefs of a piano part (dict per staff) become
+    a list of pairs.
+    """
+    if isinstance(clefID, dict):
+        clefID = list(clefID.items())
+    return [key, beats, divbeat, clefID, ending_cnt, handle_tempo]
+
+
+def unpack_measure_state(state):
+    key, beats, divbeat, clefID, ending_cnt, handle_tempo = state
+    if isinstance(clefID, list):
+        clefID = {staff_id: staff_clefID for staff_id, staff_clefID in clefID}
+    return key, beats, divbeat, clefID, ending_cnt, handle_tempo
+
+
+def convert_tree(tree, meta_tree, progress=None, cancel=None, encoding_date=None, measures=None, staves=None,
+                 measure_cache=None):
+    """
+    Converts a parsed enigmaxml tree to a MusicXML tree.
+
+    Args:
+        progress: Optional callback progress('convert:<part id>', current, total), called before every measure,
+                  with current and total counting the measures of all parts.
+        cancel (CancelToken): Optional token, checked before every measure.
+        encoding_date (date): Date written as encoding-date (default: today).
+        measures (tuple): Only convert the measures first to last (1-based, inclusive; last None for the end).
+                          The first converted measure starts with the key, time and clef in effect.
+        staves (iterable): Only convert the parts of these staves (1-based, in score order). A staff of a piano
+                           brace selects the whole braced part. Parts keep their ids.
+        measure_cache (MeasureCache): Optional cache of converted measures. A measure whose Finale data (see
+                                      measure_digests) and incoming key, time and clef are cached is copied from
+                                      the cache instead of being converted again.
+
+    Raises:
+        ValueError: When measures is not a range of the score (first before 1 or after the last measure, or last
+                    before first).
+    """
     root = tree.getroot()
     score_partwise = Element("score-partwise", version="4.0")
 
     if meta_tree:
         meta_root = meta_tree.getroot()
-        handle_meta_data(score_partwise, meta_root)
+        handle_meta_data(score_partwise, meta_root, encoding_date)
     part_list = SubElement(score_partwise, "part-list")
 
     timeSigDoAbrvCommon = len(
@@ -287,6 +476,15 @@ def convert_tree(tree, meta_tree):
     staff_groups = lookup_staff_groups(root)
 
     staff_specs = root.xpath("/f:finale/f:others/f:staffSpec[@cmper != '32767']", namespaces=ns)
+    selected_parts = None
+    if staves is not None:
+        selected_parts = set()
+        for staff_number in staves:
+            if not 1 <= staff_number <= len(staff_specs):
+                raise ValueError(f"Staff {staff_number} does not exist, the score has {len(staff_specs)} staves")
+            staff_spec_cmper = staff_specs[staff_number - 1].get("cmper")
+            piano_staff_group = get_piano_brace_staff_group(staff_spec_cmper, staff_groups)
+            selected_parts.add(piano_staff_group['startInst'] if piano_staff_group else staff_spec_cmper)
     i = 1
     part_ids = {}
     for staff_spec in staff_specs:
@@ -307,6 +505,8 @@ def convert_tree(tree, meta_tree):
         if piano_staff_group is None or piano_staff_group['startInst'] == staff_spec_cmper:
             part_id = f"P{i}"
             i += 1
+            if selected_parts is not None and staff_spec_cmper not in selected_parts:
+                continue
             part_ids[staff_spec_cmper] = part_id
             score_part = SubElement(part_list, "score-part", id=part_id)
             SubElement(score_part, "part-name").text = fullName if fullName else ''
@@ -321,10 +521,28 @@ def convert_tree(tree, meta_tree):
 
     handle_tempo = True  # todo how to handle tempo changes correctly
 
+    meas_specs = root.xpath("/f:finale/f:others/f:measSpec[not(@shared) and not(@part)]", namespaces=ns)
+    nb_measures = len(meas_specs)
+    first_idx, last_idx = 0, nb_measures
+    if measures is not None:
+        first, last = measures
+        if last is not None and last < first:
+            raise ValueError(f"Invalid measure range {first}-{last}")
+        if not 1 <= first <= nb_measures:
+            raise ValueError(f"Measure {first} does not exist, the score has {nb_measures} measures")
+        first_idx, last_idx = first - 1, nb_measures if last is None else min(last, nb_measures)
+    nb_selected = last_idx - first_idx
+    # measures before the range are not converted, but their endings are counted
+    skipped_endings = sum(1 for meas_spec in meas_specs[:first_idx]
+                          if meas_spec.find("f:barEnding", namespaces=ns) is not None)
+    part_idx = 0
+    digests = measure_digests(root) if measure_cache is not None else None
+
     for staff_spec in staff_specs:
         staff_spec_cmper = staff_spec.get("cmper")
         if staff_spec_cmper in part_ids:
-            part = SubElement(score_partwise, "part", id=part_ids[staff_spec_cmper])
+            part_id = part_ids[staff_spec_cmper]
+            part = SubElement(score_partwise, "part", id=part_id)
 
             piano_staff_group = get_piano_brace_staff_group(staff_spec_cmper, staff_groups)
 
@@ -338,14 +556,28 @@ def convert_tree(tree, meta_tree):
             current_key = -1
             current_beats = None
             current_divbeat = None
-            current_clefID = None
-            ending_cnt = 0  # todo how to find ending numbers correctly
-
-            meas_specs = root.xpath("/f:finale/f:others/f:measSpec[not(@shared) and not(@part)]", namespaces=ns)
-            nb_measures = len(meas_specs)
-            for meas_idx, meas_spec in enumerate(meas_specs):
+            # a range starting later always opens with a clef, even if the clef of its first measure is unset
+            current_clefID = None if first_idx == 0 else UNSET
+            ending_cnt = skipped_endings  # todo how to find ending numbers correctly
+
+            for meas_idx in range(first_idx, last_idx):
+                meas_spec = meas_specs[meas_idx]
+                if cancel: cancel.raise_if_cancelled()
+                if progress: progress(f'convert:{part_id}', part_idx * nb_selected + meas_idx - first_idx,
+                                      len(part_ids) * nb_selected)
                 meas_spec_cmper = meas_spec.get("cmper")
                 if VERBOSE: print(f'Staff: {staff_spec_cmper} - Measure: {meas_spec_cmper}')
+                if measure_cache is not None:
+                    cache_key = measure_cache_key(digests[meas_spec_cmper], staff_spec_cmper, meas_idx == first_idx,
+                                                  meas_idx == nb_measures - 1, current_key, current_beats,
+                                                  current_divbeat, current_clefID, ending_cnt, handle_tempo)
+                    cached = measure_cache.get(cache_key)
+                    if cached is not None:
+                        fragment, state = cached
+                        part.append(fromstring(fragment))
+                        current_key, current_beats, current_divbeat, current_clefID, ending_cnt, handle_tempo = \
+                            unpack_measure_state(state)
+                        continue
                 measure = SubElement(part, "measure", number=meas_spec_cmper)
                 beats = meas_spec.find("f:beats", namespaces=ns).text
                 divbeat = meas_spec.find("f:divbeat", namespaces=ns).text
@@ -450,7 +682,8 @@ def convert_tree(tree, meta_tree):
                         pass
                     else:
                         if meas_smart_shape['startEntry'] is None:
-                            print(meas_smart_shape)
+                            warn('unsupported-smart-shape', f'Unsupported smart shape: {meas_smart_shape}',
+                                 meas_smart_shape['shapeType'])
 
                 leftBarline = meas_spec.find("f:leftBarline", namespaces=ns).text
                 if key_ is None:
@@ -459,7 +692,7 @@ def convert_tree(tree, meta_tree):
                     key = int(key_.text)
 
                 attributes = None
-                if (meas_idx == 0):
+                if (meas_idx == first_idx):
                     attributes = handle_devisions(measure)
                 if key != current_key:
                     attributes = handle_key_change(measure, attributes, key, transp_key_adjust, transp_interval)
@@ -531,6 +764,10 @@ def convert_tree(tree, meta_tree):
                                      ['footnote', 'level', 'divisions', 'key', 'time', 'staves', 'part-symbol',
                                       'instruments', 'clef', 'staff-details', 'transpose', 'for-part', 'directive',
                                       'measure-style'])
+                if measure_cache is not None:
+                    measure_cache.put(cache_key, tostring(measure), pack_measure_state(
+                        current_key, current_beats, current_divbeat, current_clefID, ending_cnt, handle_tempo))
+            part_idx += 1
     return ElementTree(score_partwise)
 
 
@@ -548,11 +785,11 @@ def add_credit(score_partwise, page, credit_type, credit_words, default_x, defau
     credit_words_.text = credit_words
 
 
-def handle_meta_data(score_partwise, meta_root):
+def handle_meta_data(score_partwise, meta_root, encoding_date=None):
     identification = SubElement(score_partwise, "identification")
     encoding = SubElement(identification, "encoding")
     SubElement(encoding, "software").text = "musx2mxl " + musx2mxl.__version__
-    SubElement(encoding, "encoding-date").text = date.today().strftime("%Y-%m-%d")
+    SubElement(encoding, "encoding-date").text = (encoding_date or date.today()).strftime("%Y-%m-%d")
 
     title = meta_root.xpath("/m:metadata/m:fileInfo/m:title", namespaces=ns2)[0] if meta_root.xpath(
         "/m:metadata/m:fileInfo/m:title", namespaces=ns2) else None
@@ -698,7 +935,7 @@ def handle_time_change(measure, attributes, beats, divbeat, timeSigDoAbrvCommon:
         if beats == '2' and divbeat == '2048' and timeSigDoAbrvCut:
             time_.set('symbol', 'cut')
     else:
-        print("Unknown divbeat {}".format(divbeat))
+        warn('unknown-divbeat', f'Unknown divbeat {divbeat}', divbeat)
     return attributes
 
 
@@ -719,19 +956,22 @@ def process_frame(root, measure, frameSpec_cmper, frame_num, staff_id, key, tran
 def process_frame_entries(root, measure, current_entnum, end_entnum, staff_id, voice, key, transp_key_adjust,
                           transp_interval,
                           tuplet_attributes):
-    current_entry = root.xpath(f"/f:finale/f:entries/f:entry[@entnum = '{current_entnum}']", namespaces=ns)[
-        0] if root.xpath(f"/f:finale/f:entries/f:entry[@entnum = '{current_entnum}']", namespaces=ns) else None
-    if current_entry is None:
-        return
-    tuplet_attributes = process_entry(root, measure, current_entry, staff_id, voice, key, transp_key_adjust,
-                                      transp_interval, tuplet_attributes)
-
-    if current_entnum != end_entnum:
-        next_entnum = current_entry.get("next")
-        if next_entnum:
-            process_frame_entries(root, measure, next_entnum, end_entnum, staff_id, voice, key, transp_key_adjust,
-                                  transp_interval,
-                                  tuplet_attributes)
+    visited = set()
+    while current_entnum:
+        if current_entnum in visited:
+            warn('entry-chain-cycle', f'Cycle in entry chain at entry {current_entnum}.', current_entnum)
+            return
+        visited.add(current_entnum)
+        current_entry = root.xpath(f"/f:finale/f:entries/f:entry[@entnum = '{current_entnum}']", namespaces=ns)[
+            0] if root.xpath(f"/f:finale/f:entries/f:entry[@entnum = '{current_entnum}']", namespaces=ns) else None
+        if current_entry is None:
+            return
+        tuplet_attributes = process_entry(root, measure, current_entry, staff_id, voice, key, transp_key_adjust,
+                                          transp_interval, tuplet_attributes)
+
+        if current_entnum == end_entnum:
+            return
+        current_entnum = current_entry.get("next")
 
 
 def handleTupletStart(root, entry, notations, tuplet_attributes):
@@ -783,7 +1023,7 @@ def handleSmartShapeDetail(root, entry, notations):
                 slur_type = 'start' if startEntry == entnum else 'stop'
                 SubElement(notations, 'slur', number='1', type=slur_type)
         else:
-            print(f'Smart shape with cmper {shapeNum} not found.')
+            warn('smart-shape-not-found', f'smartShape with cmper {shapeNum} not found.', shapeNum)
 
 
 def lookup_artic_detail(root, entnum):
@@ -810,7 +1050,7 @@ def lookup_lyric_details(root, entnum):
             text, syllabic, extend = find_nth_syllabic(verse, int(syll))
             lyric_details.append({'number': lyricNumber, 'syllabic': syllabic, 'extend': extend, 'text': text})
         else:
-            print(f"Verse not found with number= {lyricNumber}")
+            warn('verse-not-found', f'Verse not found with number {lyricNumber}.', lyricNumber)
     return lyric_details
 
 
@@ -824,7 +1064,9 @@ def add_rest_to_empty_measure(root, measure, meas_spec_cmper, staff_id):
         current_entnum = None
         next_entnum = start_entnum
         dura = 0
-        while current_entnum != end_entnum:
+        visited = set()
+        while current_entnum != end_entnum and next_entnum not in visited:
+            visited.add(next_entnum)
             entry = root.find(f"f:entries/f:entry[@entnum = '{next_entnum}']", namespaces=ns)
             current_entnum = next_entnum
             next_entnum = entry.get("next")
@@ -0,0 +1,123 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+
+SOCKET_ENV = "MUSX2MXL_SOCKET"
+
+
+def default_socket_path():
+    """
+    Returns the socket path of the daemon: $MUSX2MXL_SOCKET, or a per-user socket in $XDG_RUNTIME_DIR or the temp dir.
+    """
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    user = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    return os.path.join(runtime_dir, f"musx2mxl-{user}.sock")
+
+
+def convert_via_daemon(input_path, output_path, keep=False, socket_path=None, reproducible=False):
+    """
+    Hands a conversion to a running daemon.
+
+    Returns:
+        bool: False when no daemon is running, True when the daemon converted the file.
+
+    Raises:
+        Exception: When the daemon failed to convert the file.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            client.connect(socket_path or default_socket_path())
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+        request = {"input_path": os.path.abspath(input_path), "output_path": os.path.abspath(output_path),
+                   "keep": keep, "reproducible": reproducible}
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with client.makefile("rb") as response_file:
+            response = response_file.readline()
+    finally:
+        client.close()
+    if not response:
+        raise Exception("Conversion daemon closed the connection")
+    response = json.loads(response)
+    if response["error"]:
+        raise Exception(response["error"])
+    return True
+
+
+class ConversionRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one request: a JSON line with input_path, output_path, keep and reproducible; answers a JSON line
+    with error.
+    """
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        from musx2mxl.workers import convert_task
+        try:
+            request = json.loads(line)
+            error = self.server.pool.apply(convert_task, (request["input_path"], request["output_path"],
+                                                          request.get("keep", False),
+                                                          request.get("reproducible", False)))
+        except Exception as e:
+            error = str(e)
+        self.wfile.write(json.dumps({"error": error}).encode("utf-8") + b"\n")
+
+
+class ConversionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, pool):
+        self.pool = pool
+        super().__init__(socket_path, ConversionRequestHandler)
+
+
+def serve(socket_path=None, processes=None):
+    """
+    Runs the conversion daemon until it is interrupted (Ctrl+C or SIGTERM).
+
+    Args:
+        socket_path (str): Path of the Unix socket (default: default_socket_path()).
+        processes (int): Number of warm worker processes (default: number of CPUs).
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise Exception("The conversion daemon needs Unix domain sockets, which are not available on this platform.")
+    socket_path = socket_path or default_socket_path()
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            raise Exception(f"A conversion daemon is already running on {socket_path}")
+        except ConnectionRefusedError:
+            os.remove(socket_path)  # left behind by a daemon that was killed
+        finally:
+            probe.close()
+
+    # imported here: the client side of this module (convert_via_daemon) needs no multiprocessing
+    from musx2mxl.workers import create_pool
+    pool = create_pool(processes)
+    old_umask = os.umask(0o177)  # socket only accessible by the current user
+    try:
+        server = ConversionServer(socket_path, pool)
+    finally:
+        os.umask(old_umask)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Conversion daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.terminate()
+        os.remove(socket_path)
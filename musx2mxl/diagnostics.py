@@ -0,0 +1,94 @@
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+MAX_DETAILS = 10  # distinct details kept per warning code
+
+logger = logging.getLogger("musx2mxl")
+current_diagnostics = ContextVar("musx2mxl_diagnostics", default=None)
+
+
+class Diagnostics:
+    """
+    Collects the warnings of a conversion, counted per code instead of printed one by one.
+
+    The converter and its helpers call warn(); convert_file installs a collector for the duration of a conversion
+    and returns it with its result.
+    """
+
+    def __init__(self):
+        self.warnings = {}  # code -> {"code", "count", "message" (first occurrence), "details"}
+
+    def add(self, code, message, detail=None):
+        warning = self.warnings.get(code)
+        if warning is None:
+            warning = self.warnings[code] = {"code": code, "count": 0, "message": message, "details": []}
+        warning["count"] += 1
+        if detail is not None and len(warning["details"]) < MAX_DETAILS and detail not in warning["details"]:
+            warning["details"].append(detail)
+
+    def merge(self, other):
+        """
+        Adds the warnings of another collector (e.g. of another file) to this one, counting the files with each
+        warning in files.
+        """
+        for code, warning in other.warnings.items():
+            merged = self.warnings.setdefault(code, {"code": code, "count": 0, "message": warning["message"],
+                                                     "details": []})
+            merged["count"] += warning["count"]
+            merged["files"] = merged.get("files", 0) + warning.get("files", 1)
+            for detail in warning["details"]:
+                if len(merged["details"]) < MAX_DETAILS and detail not in merged["details"]:
+                    merged["details"].append(detail)
+
+    def most_common(self):
+        """
+        Returns the warnings, most frequent first.
+        """
+        return sorted(self.warnings.values(), key=lambda warning: (-warning["count"], warning["code"]))
+
+    def to_json(self, **fields):
+        """
+        Returns the warnings as one JSON object, with fields (e.g. path) in front.
+        """
+        return json.dumps(dict(fields, warnings=self.most_common()), ensure_ascii=False)
+
+    def log(self, prefix=""):
+        """
+        Logs every warning code once, with its count, to the musx2mxl logger.
+        """
+        for warning in self.most_common():
+            count = f" ({warning['count']}x)" if warning["count"] > 1 else ""
+            logger.warning(f"{prefix}{warning['message']}{count}")
+
+    def __len__(self):
+        return len(self.warnings)
+
+
+def warn(code, message, detail=None):
+    """
+    Reports a conversion problem to the collector of the running conversion, or logs it when there is none.
+
+    Args:
+        code (str): Stable identifier of the kind of problem, e.g. 'instrument-not-found'.
+        message (str): Human readable description of this occurrence.
+        detail (str): The value concerned (an instrument UUID, a clef char, ...), kept for the first distinct values.
+    """
+    diagnostics = current_diagnostics.get()
+    if diagnostics is None:
+        logger.warning(message)
+    else:
+        diagnostics.add(code, message, detail)
+
+
+@contextmanager
+def collecting(diagnostics):
+    """
+    Context manager sending the warnings of the code run inside it (in this thread or task) to diagnostics.
+    """
+    token = current_diagnostics.set(diagnostics)
+    try:
+        yield diagnostics
+    finally:
+        current_diagnostics.reset(token)
@@ -2,6 +2,8 @@ import json
 import importlib.resources
 import re
 
+from musx2mxl.diagnostics import warn
+
 SHARPS_AND_FLATS = ['F', 'C', 'G', 'D', 'A', 'E', 'B']
 
 # Map of flags to note types, reversed to prioritize the most significant bit
@@ -266,7 +268,7 @@ def translate_chord_suffix(chord_suffix):
 
                     return {"kind": kind, "use-symbols": use_symbols, "parentheses-degrees": parentheses_degrees, "text": text,
                             "degrees": degrees}
-            print("could not translate suffix {}".format(chord_suffix))
+            warn('unknown-chord-suffix', f'Could not translate chord suffix {chord_suffix}', chord_suffix)
             return {"kind": "other", "use-symbols": "no", "parentheses-degrees": "no", "text": chord_suffix,
                     "degrees": []}
     else:
@@ -369,7 +371,7 @@ def calculate_step_alter_and_octave(harm_lev: int, harm_alt: int, key: int, tran
     _, fifths_no_key_adjust = calculate_mode_and_key_fifths(key, 0)
     octave = 4 + (harm_lev + ((4 * fifths_no_key_adjust) % 7) + transp_interval) // 7
     if not 0 <= octave <= 9:
-        print(f'Octave out of range: {octave}')
+        warn('octave-out-of-range', f'Octave out of range: {octave}', str(octave))
         octave = max(0, min(octave, 9))
     alter = harm_alt + calculate_alter(step, fifths)
     if enharmonic:
@@ -408,7 +410,7 @@ def translate_tempo_marks(text: str):
 
     else:
         if '=' in text_without_tags:
-            print('Could not parse tempo markings : {}'.format(text))
+            warn('unparsed-tempo-mark', f'Could not parse tempo markings: {text}', text)
         return text_without_tags, None, False, None, None
 
 
@@ -441,7 +443,7 @@ def translate_instrument(instUuid: str):
     if instUuid in INST_UUID_MAP:
         return INST_UUID_MAP[instUuid]['name'], INST_UUID_MAP[instUuid]['sound_id']
     else:
-        print('instrument not found {}'.format(instUuid))
+        warn('instrument-not-found', f'Instrument not found: {instUuid}', instUuid)
         return None, None
 
 
@@ -450,7 +452,7 @@ def translate_clef_sign(clef_char: str) -> tuple[str, int]:
     if clef_char is not None and int(clef_char) in ENGRAVER_CHAR_MAP_CLEFS:
         return ENGRAVER_CHAR_MAP_CLEFS[int(clef_char)]
     else:
-        print('Unknown clef char:', clef_char)
+        warn('unknown-clef-char', f'Unknown clef char: {clef_char}', clef_char)
         sign = 'G'
         clef_octave_change = 0
     return sign, clef_octave_change
@@ -592,7 +594,7 @@ def find_nth_syllabic(lyrics: str, n: int) -> (str, str):
     if 1 <= n <= len(syllabics):
         return syllabics[n - 1]
     else:
-        print(f"No {n}th syllabic found for {lyrics}")
+        warn('syllable-not-found', f'No {n}th syllabic found for {lyrics}', str(n))
         return "???", "single", False
 
 
@@ -0,0 +1,91 @@
+import threading
+
+from musx2mxl.musx2mxl import convert_file
+
+
+class ConversionCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    """
+    Thread-safe flag to stop a running conversion. The conversion checks it between its phases and
+    before every measure in convert_tree, and raises ConversionCancelled once it is set.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise ConversionCancelled("Conversion cancelled")
+
+
+class ConversionJob:
+    """
+    Converts a file in a background thread.
+
+    Example:
+        job = ConversionJob("score.musx", "score.mxl", progress=print).start()
+        ...
+        job.cancel()  # e.g. when the client disconnects
+        job.result()  # raises ConversionCancelled
+    """
+
+    def __init__(self, input_path, output_path, keep=False, progress=None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.keep = keep
+        self.progress = progress
+        self.cancel_token = CancelToken()
+        self.conversion_result = None  # ConversionResult of a successful conversion
+        self.error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            self.conversion_result = convert_file(self.input_path, self.output_path, self.keep, progress=self.progress,
+                         cancel=self.cancel_token)
+        except BaseException as e:
+            self.error = e
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_token.cancel()
+
+    @property
+    def cancelled(self):
+        return isinstance(self.error, ConversionCancelled)
+
+    def done(self):
+        return self._thread.ident is not None and not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """
+        Waits for the job to finish. Returns True if the job is done.
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def result(self, timeout=None):
+        """
+        Waits for the job to finish and raises the error of the conversion, if any.
+
+        Returns:
+            ConversionResult: The result of convert_file (sizes, timings, counts and warnings).
+        """
+        if not self.wait(timeout):
+            raise TimeoutError(f"Conversion of {self.input_path} not finished after {timeout} s")
+        if self.error is not None:
+            raise self.error
+        return self.conversion_result
@@ -0,0 +1,209 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from lxml.etree import XMLSyntaxError, iterparse, parse
+
+from musx2mxl.helper import ENGRAVER_CHAR_MAP_CLEFS, INST_UUID_MAP
+from musx2mxl.musx2mxl import decrypt, read_file_from_zip
+
+FINALE_NS = "http://www.makemusic.com/2012/finale"
+METADATA_NS = "http://www.makemusic.com/2012/NotationMetadata"
+SCORE_STAFF_CMPER = '32767'  # staffSpec of the score itself, not an instrument staff
+# smart shape types convert_tree writes to MusicXML (as wedges and slurs)
+CONVERTED_SMART_SHAPES = ('cresc', 'decresc', 'slurAuto', 'slurUp')
+
+
+def read_musx(input_path):
+    """
+    Reads the decoded Finale data and the metadata of a .musx file, without converting anything.
+
+    Returns:
+        tuple: (enigmaxml bytes, NotationMetadata.xml bytes)
+    """
+    data = read_file_from_zip(input_path, 'score.dat')
+    metadata = read_file_from_zip(input_path, 'NotationMetadata.xml')
+    decrypt(data)
+    return gzip.decompress(data), bytes(metadata)
+
+
+def read_file_info(metadata):
+    """
+    Returns the fields of fileInfo in NotationMetadata.xml (title, subtitle, composer, arranger, lyricist,
+    copyright, ...) as a dict of strings.
+    """
+    try:
+        meta_root = parse(BytesIO(metadata)).getroot()
+    except XMLSyntaxError:
+        # same fallback for wrongly declared encodings as in the converter
+        meta_root = parse(BytesIO(metadata.decode("latin1").encode("utf-8"))).getroot()
+    file_info = meta_root.find(f"{{{METADATA_NS}}}fileInfo")
+    if file_info is None:
+        return {}
+    return {element.tag.split('}')[-1]: element.text.strip() for element in file_info
+            if isinstance(element.tag, str) and element.text and element.text.strip()}
+
+
+def inspect_file(input_path):
+    """
+    Returns the metadata of a .musx file: path, file size and the fileInfo fields. Only NotationMetadata.xml
+    is read; score.dat is neither decrypted nor inflated.
+    """
+    with zipfile.ZipFile(input_path, 'r') as zip_ref:
+        try:
+            metadata = zip_ref.read('NotationMetadata.xml')
+        except KeyError:
+            raise FileNotFoundError("NotationMetadata.xml not found in the archive.")
+    return dict({"path": input_path, "size": os.path.getsize(input_path)}, **read_file_info(metadata))
+
+
+def lookup_instrument(inst_uuid):
+    """
+    Returns the name and category of an instrument UUID, or (None, None) when it is unknown.
+    """
+    instrument = INST_UUID_MAP.get(inst_uuid)
+    if instrument is None:
+        return None, None
+    return instrument['name'], instrument['category']
+
+
+def scan_score(enigmaxml):
+    """
+    Counts the contents of decoded Finale data in one streaming pass, without building the tree or any MusicXML.
+
+    Returns:
+        dict: staves, measures, entries, notes, tuplets, lyric_syllables, chord_symbols, smart_shapes (count per
+              shape type), instruments (uuid, name and category per staff), unknown_clef_chars (of the clefs the
+              staves use), unknown_instruments, and unsupported (the features the converter will drop or approximate).
+    """
+    tag = lambda name: f"{{{FINALE_NS}}}{name}"
+    counted = {tag(name) for name in ("staffSpec", "measSpec", "entry", "tupletDef", "lyrDataVerse", "chordAssign",
+                                      "smartShape", "clefDef", "gfhold")}
+    stats = {"staves": 0, "measures": 0, "entries": 0, "notes": 0, "tuplets": 0, "lyric_syllables": 0,
+             "chord_symbols": 0, "smart_shapes": {}, "instruments": []}
+    clef_chars = {}  # clefDef index -> clefChar
+    used_clefs = set()  # clefID of the gfholds, as looked up by convert_tree
+    unknown_instruments = set()
+    for _, element in iterparse(BytesIO(enigmaxml), events=("end",), tag=counted):
+        name = element.tag.split('}')[-1]
+        if name == "entry":
+            stats["entries"] += 1
+            stats["notes"] += len(element.findall(tag("note")))
+        elif name == "measSpec":
+            # same selection as convert_tree: measures of the score, not of linked parts
+            if element.get("shared") is None and element.get("part") is None:
+                stats["measures"] += 1
+        elif name == "staffSpec":
+            if element.get("cmper") != SCORE_STAFF_CMPER:
+                inst_uuid = element.findtext(tag("instUuid"))
+                inst_name, category = lookup_instrument(inst_uuid)
+                stats["instruments"].append({"uuid": inst_uuid, "name": inst_name, "category": category})
+                if inst_name is None:
+                    unknown_instruments.add(inst_uuid)
+        elif name == "tupletDef":
+            if element.find(tag("symbolicNum")) is not None:
+                stats["tuplets"] += 1
+        elif name == "lyrDataVerse":
+            if element.find(tag("syll")) is not None:
+                stats["lyric_syllables"] += 1
+        elif name == "chordAssign":
+            stats["chord_symbols"] += 1
+        elif name == "smartShape":
+            shape_type = element.findtext(tag("shapeType"))
+            stats["smart_shapes"][shape_type] = stats["smart_shapes"].get(shape_type, 0) + 1
+        elif name == "clefDef":
+            clef_chars[element.get("index")] = element.findtext(tag("clefChar"))
+        elif name == "gfhold":
+            clef_id = element.findtext(tag("clefID"))
+            if clef_id:
+                used_clefs.add(clef_id)
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]  # also drop the elements that are not counted
+
+    stats["staves"] = len(stats["instruments"])
+    unknown_clef_chars = {clef_chars[clef_id] for clef_id in used_clefs if clef_id in clef_chars
+                          and not is_known_clef_char(clef_chars[clef_id])}
+    stats["unknown_clef_chars"] = sorted(unknown_clef_chars, key=str)
+    stats["unknown_instruments"] = sorted(unknown_instruments, key=str)
+    stats["unsupported"] = ([f"smart-shape:{shape_type}" for shape_type in sorted(stats["smart_shapes"], key=str)
+                             if shape_type not in CONVERTED_SMART_SHAPES]
+                            + [f"clef-char:{clef_char}" for clef_char in stats["unknown_clef_chars"]]
+                            + [f"instrument:{inst_uuid}" for inst_uuid in stats["unknown_instruments"]])
+    return stats
+
+
+def is_known_clef_char(clef_char):
+    return clef_char is not None and clef_char.isdigit() and int(clef_char) in ENGRAVER_CHAR_MAP_CLEFS
+
+
+def score_stats(input_path):
+    """
+    Returns the statistics of a .musx file (see scan_score) with its path, without converting it.
+    """
+    enigmaxml, _ = read_musx(input_path)
+    return dict({"path": input_path}, **scan_score(enigmaxml))
+
+
+def try_score_stats(input_path):
+    try:
+        return score_stats(input_path)
+    except Exception as e:
+        return {"path": input_path, "error": str(e) or type(e).__name__}
+
+
+def print_stats(paths, jobs=1):
+    """
+    Prints the statistics of every file as one JSON object per line (with error for unreadable files).
+
+    Returns:
+        int: Exit code, 1 if any file could not be read.
+    """
+    failed = 0
+    if jobs > 1:
+        executor = ProcessPoolExecutor(jobs)
+        results = executor.map(try_score_stats, paths, chunksize=4)
+    else:
+        executor = None
+        results = map(try_score_stats, paths)
+    try:
+        for stats in results:
+            failed += "error" in stats
+            sys.stdout.write(json.dumps(stats, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    finally:
+        if executor:
+            executor.shutdown()
+    return 1 if failed else 0
+
+
+def estimate_cost(score):
+    """
+    Relative conversion cost of a scanned score: the converter works per entry and per measure of every staff.
+    """
+    return score["entries"] + score["measures"] * score["staves"]
+
+
+def main(argv=None):
+    """
+    Entry point of 'musx2mxl inspect': prints the metadata of every file as one JSON object per line.
+    """
+    parser = argparse.ArgumentParser(prog="musx2mxl inspect",
+                                     description="Print the metadata (title, composer, ...) of Finale .musx files as JSON lines, without decoding the score.")
+    parser.add_argument("files", nargs="+", metavar="FILE", help="Finale files (*.musx).")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for input_path in args.files:
+        try:
+            info = inspect_file(input_path)
+        except Exception as e:
+            info = {"path": input_path, "error": str(e) or type(e).__name__}
+            failed += 1
+        sys.stdout.write(json.dumps(info, ensure_ascii=False) + "\n")
+    return 1 if failed else 0
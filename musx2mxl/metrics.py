@@ -0,0 +1,140 @@
+import os
+import tempfile
+import threading
+import time
+
+REFRESH_INTERVAL = 15.0  # seconds between two writes of the metrics file
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)  # seconds
+SIZE_BUCKETS = tuple(2 ** 10 * size for size in (16, 64, 256, 1024, 4096, 16384, 65536))  # bytes, 16 KB to 64 MB
+
+
+class Histogram:
+    """
+    Prometheus histogram: cumulative counts per upper bound, sum and count of the observed values.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def format(self, name, labels=""):
+        separator = "," if labels else ""
+        lines = [f'{name}_bucket{{{labels}{separator}le="{bound:g}"}} {count}'
+                 for bound, count in zip(self.buckets, self.counts)]
+        lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}" if labels else f"{name}_sum {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}" if labels else f"{name}_count {self.count}")
+        return lines
+
+
+class BatchMetrics:
+    """
+    Metrics of a directory conversion or a hot folder, written in the Prometheus text format to a file read by the
+    textfile collector of the node exporter. The file is replaced atomically every interval seconds while the run
+    lasts, and once more at its end.
+
+    Example:
+        metrics = BatchMetrics("/var/lib/node_exporter/textfile/musx2mxl.prom").start()
+        ...
+        metrics.record("converted", result)
+        metrics.stop()
+    """
+
+    def __init__(self, path, interval=REFRESH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.files = {"converted": 0, "cached": 0, "failed": 0, "quarantined": 0}  # status -> count
+        self.phase_seconds = {}  # phase -> Histogram of ConversionResult.timings
+        self.total_seconds = Histogram(DURATION_BUCKETS)
+        self.input_bytes = Histogram(SIZE_BUCKETS)
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.started = time.time()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, status, result=None):
+        """
+        Counts a finished file. status is converted, cached, failed or quarantined; the timings and input size of
+        result (a ConversionResult) are added to the histograms.
+        """
+        with self.lock:
+            self.files[status] = self.files.get(status, 0) + 1
+            if result is not None:
+                for phase, seconds in result.timings.items():
+                    self.phase_seconds.setdefault(phase, Histogram(DURATION_BUCKETS)).observe(seconds)
+                self.total_seconds.observe(sum(result.timings.values()))
+                if "input" in result.sizes:
+                    self.input_bytes.observe(result.sizes["input"])
+
+    def set_queue(self, queue_depth, in_flight):
+        """
+        Sets the number of files waiting for a worker and the number of files being converted.
+        """
+        with self.lock:
+            self.queue_depth = queue_depth
+            self.in_flight = in_flight
+
+    def format(self):
+        with self.lock:
+            lines = ["# TYPE musx2mxl_files_total counter",
+                     *(f'musx2mxl_files_total{{status="{status}"}} {count}'
+                       for status, count in sorted(self.files.items())),
+                     "# TYPE musx2mxl_phase_duration_seconds histogram"]
+            for phase, histogram in self.phase_seconds.items():
+                lines.extend(histogram.format("musx2mxl_phase_duration_seconds", f'phase="{phase}"'))
+            lines.append("# TYPE musx2mxl_conversion_duration_seconds histogram")
+            lines.extend(self.total_seconds.format("musx2mxl_conversion_duration_seconds"))
+            lines.append("# TYPE musx2mxl_input_size_bytes histogram")
+            lines.extend(self.input_bytes.format("musx2mxl_input_size_bytes"))
+            lines.extend(["# TYPE musx2mxl_queue_depth gauge",
+                          f"musx2mxl_queue_depth {self.queue_depth}",
+                          "# TYPE musx2mxl_in_flight gauge",
+                          f"musx2mxl_in_flight {self.in_flight}",
+                          "# TYPE musx2mxl_start_time_seconds gauge",
+                          f"musx2mxl_start_time_seconds {self.started:.0f}",
+                          "# TYPE musx2mxl_last_update_time_seconds gauge",
+                          f"musx2mxl_last_update_time_seconds {time.time():.0f}"])
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        # the collector must never read a partially written file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".musx2mxl-", suffix=".prom.tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(self.format())
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _refresh(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"Error writing metrics to {self.path}: {e}")
+
+    def start(self):
+        self.write()
+        self._thread = threading.Thread(target=self._refresh, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+        self.write()
@@ -1,11 +1,29 @@
 import argparse
+import datetime
+import functools
 import gzip
+import hashlib
+import json
 import os
+import re
+import struct
+import sys
+import time
 import traceback
 import zipfile
+import zlib
+from contextlib import redirect_stdout
 from io import BytesIO
 
-from musx2mxl import converter
+import musx2mxl
+from musx2mxl.diagnostics import Diagnostics, collecting
+from musx2mxl.metrics import REFRESH_INTERVAL
+from musx2mxl.result import ConversionResult, PhaseTimer
+from musx2mxl.sharding import DEFAULT_LEASE_TTL, LeaseRefresher, parse_shard, in_shard, claim_lease, complete_lease
+from musx2mxl.sinks import DEFAULT_OUTPUTS, SINKS, SinkInput, needs_conversion, select_sinks, write_sinks
+
+# The modules of batch conversion, archives, caches, profiling, the hot folder and the daemon server are imported
+# where they are used: a single file handed to the conversion daemon only needs argparse, socket and json.
 
 # Constants for the MUSX PRNG-based stream cipher
 CIPHER_INITIAL_STATE = 0x28006D45
@@ -13,6 +31,25 @@ CIPHER_MULTIPLIER = 0x41C64E6D
 CIPHER_INCREMENT = 0x3039
 CIPHER_RESET_INTERVAL = 0x20000
 
+GZIP_MAGIC = b"\x1f\x8b"
+ZIP_MAGIC = b"PK\x03\x04"
+
+# Pre-flight classification of input files (see sniff)
+SNIFF_VALID = "valid"
+SNIFF_ENCRYPTED = "encrypted-unsupported"
+SNIFF_TRUNCATED = "truncated"
+SNIFF_NOT_MUSX = "not-musx"
+
+# Reproducible output: time stamp override (see https://reproducible-builds.org/specs/source-date-epoch/)
+SOURCE_DATE_EPOCH_ENV = "SOURCE_DATE_EPOCH"
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# Parsed score shared with the forked workers of convert_parts: (tree, meta tree, date_time)
+split_parts_input = None
+
+# Framed stream of documents: every document is preceded by its length as 8-byte unsigned big-endian integer
+FRAME_HEADER = struct.Struct(">Q")
+
 def decrypt(buffer):
     """
     Encrypts/decrypts a buffer in place using a custom PRNG-based stream cipher.
@@ -56,6 +93,45 @@ def read_file_from_zip(file_path, target_file):
             raise FileNotFoundError(f"{target_file} not found in the archive.")
 
 
+def sniff(file_path):
+    """
+    Cheaply classifies a file before conversion. Only the zip central directory and the first bytes of
+    score.dat are read, nothing is inflated.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: SNIFF_VALID, SNIFF_ENCRYPTED (unknown encryption), SNIFF_TRUNCATED or SNIFF_NOT_MUSX.
+    """
+    try:
+        with zipfile.ZipFile(file_path, 'r') as zip_ref:
+            names = zip_ref.namelist()
+            if 'score.dat' not in names or 'NotationMetadata.xml' not in names:
+                return SNIFF_NOT_MUSX
+            info = zip_ref.getinfo('score.dat')
+            if info.flag_bits & 0x1:
+                return SNIFF_ENCRYPTED  # password protected zip entry
+            if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                return SNIFF_NOT_MUSX  # Finale never writes bzip2, lzma or other methods
+            with zip_ref.open(info) as file:
+                head = bytearray(file.read(len(GZIP_MAGIC)))
+    except zipfile.BadZipFile:
+        # a zip without central directory was most likely cut off during upload or copy
+        with open(file_path, "rb") as file:
+            return SNIFF_TRUNCATED if file.read(len(ZIP_MAGIC)) == ZIP_MAGIC else SNIFF_NOT_MUSX
+    except (EOFError, zlib.error):
+        return SNIFF_TRUNCATED
+    except (NotImplementedError, RuntimeError):
+        # compression method or zip feature zipfile does not support
+        return SNIFF_NOT_MUSX
+
+    if len(head) < len(GZIP_MAGIC):
+        return SNIFF_TRUNCATED
+    decrypt(head)
+    return SNIFF_VALID if head == GZIP_MAGIC else SNIFF_ENCRYPTED
+
+
 # def decompress_data(data, output_file):
 #     """
 #     Decompresses gzip data and writes the decompressed data to a file.
@@ -115,7 +191,7 @@ def write_file(file_path, data):
         file.write(data)
 
 
-def save_as_mxl(data, output_path, musicxml_filename="score.musicxml"):
+def save_as_mxl(data, output_path, musicxml_filename="score.musicxml", date_time=None):
     """
     Save an ElementTree XML object as a compressed MXL file directly to a zip archive.
 
@@ -123,6 +199,7 @@ def save_as_mxl(data, output_path, musicxml_filename="score.musicxml"):
         data: Data (score.musicxml) to compress.
         output_path: Path to save the .mxl file.
         musicxml_filename: Name of the main MusicXML file within the MXL package.
+        date_time: Time stamp (year, month, day, hour, minute, second) of the zip entries (default: now).
     """
 
     data.seek(0)
@@ -139,102 +216,923 @@ def save_as_mxl(data, output_path, musicxml_filename="score.musicxml"):
     # Mimetype content
     mimetype_content = b"application/vnd.recordare.musicxml"
 
+    # A file hardlinked from the result cache is replaced, not overwritten in place
+    if isinstance(output_path, str) and os.path.isfile(output_path) and os.stat(output_path).st_nlink > 1:
+        os.remove(output_path)
+
+    def entry(name, compress_type=zipfile.ZIP_DEFLATED):
+        if date_time is None:
+            info = zipfile.ZipInfo(name, time.localtime()[:6])
+            info.external_attr = 0o600 << 16  # as writestr
+        else:
+            info = zipfile.ZipInfo(name, date_time)
+            info.external_attr = 0o644 << 16
+        info.compress_type = compress_type
+        return info
+
     # Write all data directly into a zip archive
     with zipfile.ZipFile(output_path, "w") as mxl_zip:
         # Add the mimetype file (must be uncompressed and first in the archive)
-        mxl_zip.writestr("mimetype", mimetype_content, compress_type=zipfile.ZIP_STORED)
-        # Add the MusicXML content
-        mxl_zip.writestr(musicxml_filename, data.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+        mxl_zip.writestr(entry("mimetype", zipfile.ZIP_STORED), mimetype_content)
+        # Add the MusicXML content, compressed straight from the buffer without copying it
+        with data.getbuffer() as view:
+            info = entry(musicxml_filename)
+            info.file_size = len(view)
+            with mxl_zip.open(info, "w") as file:
+                file.write(view)
         # Add the container.xml
-        mxl_zip.writestr("META-INF/container.xml", container_data, compress_type=zipfile.ZIP_DEFLATED)
+        mxl_zip.writestr(entry("META-INF/container.xml"), container_data)
+
+def source_date_time(input_path=None):
+    """
+    Returns the time stamp of a reproducible conversion: $SOURCE_DATE_EPOCH if set, else the modification time of
+    score.dat in the .musx file (the earliest zip time stamp without input_path, e.g. for an archive of many files).
+
+    Returns:
+        tuple: (year, month, day, hour, minute, second), not before 1980 (the earliest zip time stamp).
+    """
+    epoch = os.environ.get(SOURCE_DATE_EPOCH_ENV)
+    if epoch:
+        date_time = time.gmtime(int(epoch))[:6]
+    elif input_path is None:
+        date_time = ZIP_EPOCH
+    else:
+        with zipfile.ZipFile(input_path, 'r') as zip_ref:
+            date_time = zip_ref.getinfo('score.dat').date_time
+    return max(tuple(date_time), ZIP_EPOCH)
+
+
+def convert_file(input_path, output_path, keep = False, progress=None, cancel=None, reproducible=False, measures=None,
+                 staves=None, measure_cache=None, outputs=None, diagnostics=None, profile=None):
+    """
+    Converts a Finale file (*.musx) to a compressed MusicXML file (*.mxl), or to other outputs.
+
+    Args:
+        input_path (str): Path to the .musx file, or a seekable binary file object.
+        output_path (str): Path to the .mxl file, or a seekable binary file object.
+        keep (bool): Also write the decoded Finale data (*.enigmaxml) and the uncompressed MusicXML (*.musicxml).
+        progress: Optional callback progress(phase, current, total), called when a phase of the conversion starts
+                  ('unzip', 'decrypt', 'inflate', 'parse', 'convert:<part id>', 'serialize', 'zip') and with
+                  ('zip', 1, 1) when the file is written. The convert phases are reported for every measure, with
+                  current and total counting the measures of all parts.
+        cancel (CancelToken): Optional token to stop the conversion; raises ConversionCancelled when set.
+        reproducible (bool): Make the output a pure function of the input: the encoding date and the zip time stamps
+                             are taken from source_date_time instead of the current time.
+        measures (tuple): Only convert the measures (first, last), 1-based and inclusive (last None for the end).
+        staves (iterable): Only convert the parts of these staves (1-based, in score order).
+        measure_cache (MeasureCache): Reuse the measures converted before and unchanged since (see convert_tree).
+                                      A path opens the MeasureCache database there ('' for the default).
+        outputs (iterable): Names of the sinks to write (see sinks.py: 'mxl', 'musicxml', 'enigmaxml', 'stats';
+                            default: mxl). Sinks other than mxl write to output_path with their own extension. All are
+                            fed from one decode and one serialization; without mxl and musicxml nothing is converted.
+        diagnostics (Diagnostics): Collects the warnings of the conversion (default: a new collector).
+        profile (str): Run the conversion under cProfile and write one .pstats file per phase, all.pstats and
+                       stacks.collapsed (for flame graph tools) to this directory (see PhaseProfiler).
+
+    Returns:
+        ConversionResult: With the sizes of the input, intermediate data and output, the time spent in every phase,
+                          the number of parts, measures and notes, and the warnings of the conversion (counted per
+                          code; nothing is printed for them).
+    """
+    if profile:
+        from musx2mxl.profiling import PhaseProfiler
+        profiler = PhaseProfiler()
+        try:
+            return convert_file(input_path, output_path, keep, progress=profiler.wrap(progress), cancel=cancel,
+                                reproducible=reproducible, measures=measures, staves=staves,
+                                measure_cache=measure_cache, outputs=outputs, diagnostics=diagnostics)
+        finally:
+            profiler.stop()
+            profiler.write(profile)
+    result = ConversionResult(input_path, output_path, diagnostics if diagnostics is not None else Diagnostics())
+    timer = PhaseTimer(result.timings)
+    progress = timer.wrap(progress)
+    with collecting(result.diagnostics):
+        try:
+            if progress: progress('unzip', 0, 1)
+            data = read_file_from_zip(input_path, 'score.dat')
+            metadata = read_file_from_zip(input_path, 'NotationMetadata.xml')
+            date_time = source_date_time(input_path) if reproducible else None
+            result.sizes["input"] = file_size(input_path)
+            result.sizes["score_dat"] = len(data)
+            if cancel: cancel.raise_if_cancelled()
+            if progress: progress('decrypt', 0, 1)
+            decrypt(data)
+            if cancel: cancel.raise_if_cancelled()
+            if progress: progress('inflate', 0, 1)
+            data = gzip.decompress(data)
+            result.sizes["enigmaxml"] = len(data)
+            sinks = select_sinks(outputs, keep)
+            source = SinkInput(input_path, data, date_time)
+            write_sinks(sinks, output_path, source, after_conversion=False)
+            if not needs_conversion(sinks):
+                return result
+            input_stream = BytesIO(data)
+            metadata_stream = BytesIO(metadata)
+            output_stream = BytesIO()
+            # imported on first use: a CLI call handed to the conversion daemon never loads lxml and the instrument table
+            from musx2mxl import converter
+            own_cache = isinstance(measure_cache, str)
+            if own_cache:
+                from musx2mxl.cache import MeasureCache
+                measure_cache = MeasureCache(measure_cache or None)
+            try:
+                output_tree = converter.convert_from_stream(input_stream, metadata_stream, output_stream, progress,
+                                                            cancel, datetime.date(*date_time[:3]) if date_time else None,
+                                                            measures, staves, measure_cache)
+            finally:
+                if own_cache:
+                    measure_cache.close()
+            source.musicxml = output_stream
+            result.sizes["musicxml"] = output_stream.tell()
+            if cancel: cancel.raise_if_cancelled()
+            if progress: progress('zip', 0, 1)
+            write_sinks(sinks, output_path, source)
+            if 'mxl' in sinks:
+                result.sizes["output"] = file_size(output_path)
+            if progress: progress('zip', 1, 1)
+            timer.stop()
+            result.counts = count_score(output_tree)
+        except zipfile.BadZipFile as e:
+            print(f"Error: {e}")
+            traceback.print_exc()
+            raise Exception('Invalid File: Is no Finale Music Notation (musx)')
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            traceback.print_exc()
+            raise Exception('Invalid File: Is no Finale Music Notation (musx)')
+        except Exception as e:
+            raise e
+        finally:
+            timer.stop()
+
+    return result
+
+
+def file_size(file):
+    """
+    Returns the size of a file, given by path or as seekable file object (at its end after writing).
+    """
+    if isinstance(file, str):
+        return os.path.getsize(file)
+    return file.seek(0, os.SEEK_END)
+
+
+def count_score(output_tree):
+    """
+    Returns the number of parts, measures (per part) and notes (without rests) of a MusicXML tree.
+    """
+    parts = output_tree.getroot().findall("part")
+    return {"parts": len(parts), "measures": len(parts[0]) if parts else 0,
+            "notes": len(output_tree.xpath("//note[not(rest)]"))}
+
+
+def part_file_name(stem, part):
+    name = re.sub(r"[^\w.-]+", "_", part['name']).strip("_.")
+    return f"{stem}-{part['id']}-{name}.mxl" if name else f"{stem}-{part['id']}.mxl"
+
+
+def convert_part(output_path, staves):
+    """
+    Converts one part of the score decoded by convert_parts. Runs in a forked worker sharing the parsed trees.
+    """
+    from musx2mxl import converter
+    tree, meta_tree, date_time = split_parts_input
+    encoding_date = datetime.date(*date_time[:3]) if date_time else None
+    with collecting(Diagnostics()) as diagnostics:
+        output_tree = converter.convert_tree(tree, meta_tree, encoding_date=encoding_date, staves=staves)
+    output_stream = BytesIO()
+    converter.write_tree(output_tree, output_stream)
+    save_as_mxl(output_stream, output_path, date_time=date_time)
+    return diagnostics
+
 
-def convert_file(input_path, output_path, keep = False):
+def convert_parts(input_path, output_dir=None, jobs=None, reproducible=False):
+    """
+    Converts every part of a Finale file to its own .mxl file. The file is decoded and parsed once; the parts are
+    converted in parallel by forked worker processes sharing the parsed score (sequentially where fork is not
+    available).
+
+    Args:
+        input_path (str): Path to the .musx file.
+        output_dir (str): Directory for the .mxl files (default: next to the .musx file), named
+                          <name>-<part id>-<part name>.mxl.
+        jobs (int): Number of worker processes (default: number of CPUs).
+        reproducible (bool): See convert_file.
+
+    Returns:
+        list: Paths of the .mxl files.
+    """
+    global split_parts_input
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from musx2mxl import converter
+    data = read_file_from_zip(input_path, 'score.dat')
+    metadata = read_file_from_zip(input_path, 'NotationMetadata.xml')
+    decrypt(data)
+    data = gzip.decompress(data)
+    tree, meta_tree = converter.parse_trees(BytesIO(data), BytesIO(metadata))
+    date_time = source_date_time(input_path) if reproducible else None
+    parts = converter.lookup_parts(tree.getroot())
+
+    output_dir = output_dir or os.path.dirname(input_path)
+    os.makedirs(output_dir or ".", exist_ok=True)
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    output_paths = [os.path.join(output_dir, part_file_name(stem, part)) for part in parts]
+
+    split_parts_input = (tree, meta_tree, date_time)
+    diagnostics = Diagnostics()
     try:
-        data = read_file_from_zip(input_path, 'score.dat')
-        metadata = read_file_from_zip(input_path, 'NotationMetadata.xml')
-        decrypt(data)
-        data = gzip.decompress(data)
-        if keep:
-            with open(output_path.replace(".mxl", ".enigmaxml"), "wb") as file:
-                file.write(data)
-        input_stream = BytesIO(data)
-        metadata_stream = BytesIO(metadata)
-        output_stream = BytesIO()
-        converter.convert_from_stream(input_stream, metadata_stream, output_stream)
-        if keep:
-            with open(output_path.replace(".mxl", ".musicxml"), "wb") as file:
-                output_stream.seek(0)
-                file.write(output_stream.getvalue())
-        save_as_mxl(output_stream, output_path)
-    except zipfile.BadZipFile as e:
-        print(f"Error: {e}")
-        traceback.print_exc()
-        raise Exception('Invalid File: Is no Finale Music Notation (musx)')
-    except FileNotFoundError as e:
-        print(f"Error: {e}")
-        traceback.print_exc()
-        raise Exception('Invalid File: Is no Finale Music Notation (musx)')
-    except Exception as e:
-        raise e
-
-
-
-def process_directory(directory, output_dir=None, recursive=False, keep=False):
+        if "fork" in multiprocessing.get_all_start_methods() and len(parts) > 1 and jobs != 1:
+            with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("fork")) as executor:
+                for part_diagnostics in executor.map(convert_part, output_paths, [part['staves'] for part in parts]):
+                    diagnostics.merge(part_diagnostics)
+        else:
+            for output_path, part in zip(output_paths, parts):
+                diagnostics.merge(convert_part(output_path, part['staves']))
+    finally:
+        split_parts_input = None
+    diagnostics.log(f"{input_path}: ")
+    return output_paths
+
+
+def convert_bytes(data, progress=None, cancel=None, reproducible=False, measures=None, staves=None, diagnostics=None):
     """
-    Process all .musx files in a directory, optionally scanning subdirectories.
+    Converts the content of a Finale file (*.musx) in memory.
+
+    Args:
+        data (bytes): Content of the .musx file.
+        reproducible, measures, staves, diagnostics: See convert_file.
+
+    Returns:
+        bytes: Content of the .mxl file.
+    """
+    output_stream = BytesIO()
+    convert_file(BytesIO(data), output_stream, progress=progress, cancel=cancel, reproducible=reproducible,
+                 measures=measures, staves=staves, diagnostics=diagnostics)
+    return output_stream.getvalue()
+
+
+def read_frame(stream):
+    """
+    Reads a length-prefixed document from a binary stream.
+
+    Returns:
+        bytes: The document, or None at the end of the stream.
     """
-    for root, _, files in os.walk(directory):
-        for file in files:
+    header = stream.read(FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < FRAME_HEADER.size:
+        raise EOFError("Truncated frame header")
+    (length,) = FRAME_HEADER.unpack(header)
+    data = stream.read(length)
+    if len(data) < length:
+        raise EOFError(f"Truncated frame: expected {length} bytes, got {len(data)}")
+    return data
+
+
+def write_frame(stream, data):
+    stream.write(FRAME_HEADER.pack(len(data)))
+    stream.write(data)
+    stream.flush()
+
+
+def convert_framed(input_stream, output_stream, reproducible=False):
+    """
+    Converts a stream of length-prefixed .musx documents to a stream of length-prefixed .mxl documents,
+    one output frame per input frame. A failed conversion yields an empty frame (the error goes to stderr, like the
+    warnings of every document).
+
+    Returns:
+        int: Number of failed conversions.
+    """
+    failed = 0
+    index = 0
+    while (data := read_frame(input_stream)) is not None:
+        diagnostics = Diagnostics()
+        try:
+            mxl = convert_bytes(data, reproducible=reproducible, diagnostics=diagnostics)
+        except Exception as e:
+            print(f"Error in document {index}: {e}", file=sys.stderr)
+            mxl = b""
+            failed += 1
+        diagnostics.log(f"Document {index}: ")
+        write_frame(output_stream, mxl)
+        index += 1
+    return failed
+
+
+def find_musx_files(directory, recursive=False):
+    """
+    Yields all .musx files in a directory in a stable order, optionally scanning subdirectories.
+    """
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
             if file.endswith(".musx"):
-                input_path = os.path.join(root, file)
-                output_path = os.path.join(output_dir or root, file.replace(".musx", ".mxl"))
+                yield os.path.join(root, file)
+
+        if not recursive:
+            break  # Stop after processing the first directory if not recursive
+
+
+def convert_file_to_bytes(input_path, reproducible=False):
+    """
+    Converts a .musx file in memory.
+
+    Returns:
+        ConversionResult: With the content of the .mxl file as data.
+    """
+    output_stream = BytesIO()
+    result = convert_file(input_path, output_stream, reproducible=reproducible)
+    result.data = output_stream.getvalue()
+    return result
+
+
+def convert_batch_file(input_path, output_path=None, keep=False, timeout=None, max_memory=None, reproducible=False,
+                       measure_cache=None, outputs=None):
+    """
+    Converts one file of a batch, in a child process killed when it exceeds the timeout or max_memory budget.
+    measure_cache (the path of a MeasureCache database) and outputs are used when writing to output_path.
+
+    Returns:
+        ConversionResult: With the content of the .mxl file as data when output_path is None.
+    """
+    if output_path is None:
+        func = functools.partial(convert_file_to_bytes, input_path, reproducible=reproducible)
+    else:
+        func = functools.partial(convert_file, input_path, output_path, keep, reproducible=reproducible,
+                                 measure_cache=measure_cache, outputs=outputs)
+    if timeout is not None or max_memory is not None:
+        from musx2mxl.budget import run_with_budget
+        return run_with_budget(func, timeout=timeout, max_memory=max_memory)
+    return func()
+
+
+def future_outcome(future):
+    """
+    Returns (result, None) or (None, exception) of a finished future.
+    """
+    error = future.exception()
+    return (None, error) if error is not None else (future.result(), None)
+
+
+def process_directory(directory, output_dir=None, recursive=False, keep=False, shard=None, lease_dir=None,
+                      lease_ttl=DEFAULT_LEASE_TTL, timeout=None, max_memory=None, quarantine=None, preflight=False,
+                      output_archive=None, jobs=1, cache_dir=None, reproducible=False, outputs=None,
+                      diagnostics_file=None, report=None, metrics=None, metrics_interval=REFRESH_INTERVAL):
+    """
+    Process all .musx files in a directory, optionally scanning subdirectories.
+
+    Several workers (on one or more machines sharing the directory) can process the same tree:
+    - shard=(i, N) only processes the files whose relative path hashes to shard i of N.
+    - lease_dir makes the workers claim each file through a lease file, so files are never converted twice. A file
+      is claimed when it is submitted to a worker, and its lease is refreshed until it is done.
+
+    With a timeout (seconds) or max_memory (bytes), each file is converted in a child process that is killed when
+    it exceeds the budget. Killed files are appended to the quarantine file (if given) and skipped in later runs.
+
+    With preflight, files are first classified with sniff and only valid Finale files are converted.
+
+    With jobs > 1, the files are converted by that many worker processes.
+    With output_archive (.zip or .tar path), the .mxl files are collected into that archive under their path relative
+    to the directory, followed by a manifest.json member listing every converted or failed file. With reproducible,
+    the archive is too (see ArchiveWriter), and the manifest names the directory without its location.
+
+    With cache_dir ('' for the default cache directory), converted files are stored in a ResultCache and files whose
+    content was converted before, by the same musx2mxl version, are taken from the cache (not with keep).
+
+    With reproducible, the output is a pure function of the input (see convert_file).
+
+    Outputs selects the sinks written for every file (see convert_file); the cache and output_archive only hold .mxl
+    files and are not used with other outputs.
+
+    The warnings of every converted file are logged once per code, or written to diagnostics_file (one JSON object per
+    file). The most frequent warnings of the whole directory are printed at the end.
+
+    With report (a path), one JSON object per file is written to that file: the ConversionResult (sizes, time per
+    phase, counts and warnings) of converted files, and the error of failed files.
+
+    With metrics (a path), the counts of converted, cached, failed and quarantined files, histograms of the time per
+    phase and of the input sizes, the queue depth (selected files not processed yet) and the files in flight are
+    written to that file in the Prometheus text format, every metrics_interval seconds and at the end (see
+    BatchMetrics).
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+    from musx2mxl.archives import ArchiveWriter
+    from musx2mxl.budget import BudgetExceeded, add_to_quarantine, is_quarantined, load_quarantine
+    from musx2mxl.cache import ResultCache
+    from musx2mxl.metrics import BatchMetrics
+    if outputs is not None and tuple(outputs) != DEFAULT_OUTPUTS:
+        if output_archive:
+            raise ValueError("An output archive only holds .mxl files")
+        cache_dir = None
+    refresher = None
+    if lease_dir:
+        os.makedirs(lease_dir, exist_ok=True)
+        refresher = LeaseRefresher(lease_ttl).start()
+    quarantined = load_quarantine(quarantine)
+    sniffed = {}
+    writer = None
+    if output_archive:
+        writer = ArchiveWriter(output_archive, source_date_time() if reproducible else None)
+    manifest = []
+    warnings = Diagnostics()
+    diagnostics_writer = open(diagnostics_file, "w", encoding="utf-8") if diagnostics_file else None
+    report_writer = open(report, "w", encoding="utf-8") if report else None
+    batch_metrics = BatchMetrics(metrics, metrics_interval).start() if metrics else None
+    backlog = {"files": 0, "finished": 0}  # files to process and files finished or skipped, for the queue depth
+    if batch_metrics:
+        backlog["files"] = sum(1 for input_path in find_musx_files(directory, recursive)
+                               if (not shard or in_shard(os.path.relpath(input_path, directory), shard))
+                               and not is_quarantined(quarantined, input_path))
+
+    def selected_files():
+        for input_path in find_musx_files(directory, recursive):
+            rel_path = os.path.relpath(input_path, directory)
+            if shard and not in_shard(rel_path, shard):
+                continue
+            if is_quarantined(quarantined, input_path):
+                print(f"Skipped (quarantined): {input_path}")
+                continue
+            if preflight:
+                status = sniff(input_path)
+                sniffed[status] = sniffed.get(status, 0) + 1
+                if status != SNIFF_VALID:
+                    print(f"Skipped ({status}): {input_path}")
+                    backlog["finished"] += 1
+                    continue
+            lease_path = None
+            if lease_dir:
+                lease_path = claim_lease(lease_dir, rel_path, lease_ttl)
+                if lease_path is None:
+                    backlog["finished"] += 1
+                    continue  # claimed or done by another worker
+                refresher.add(lease_path)
+            if writer:
+                output_path = None
+            else:
+                output_path = os.path.join(output_dir or os.path.dirname(input_path),
+                                           os.path.basename(input_path).replace(".musx", ".mxl"))
+            yield input_path, output_path, lease_path
+
+    def finish(input_path, output_path, lease_path, result, error, cached=False):
+        # runs in this process only, so the archive and the manifest have a single writer
+        rel_path = os.path.relpath(input_path, directory).replace(os.sep, '/')
+        status = 'ok'
+        backlog["finished"] += 1
+        try:
+            if error is None:
+                if writer:
+                    name = rel_path[:-len(".musx")] + ".mxl"
+                    writer.write(name, result.data)
+                    manifest.append({"source": rel_path, "name": name, "size": len(result.data),
+                                     "sha256": hashlib.sha256(result.data).hexdigest()})
+                    output_path = f"{output_archive}:{name}"
+                print(f"{'Cached' if cached else 'Converted'}: {input_path} -> {output_path}")
+                if report_writer:
+                    record = {"path": input_path, "cached": True} if cached else result.to_dict()
+                    report_writer.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if not cached:
+                    warnings.merge(result.diagnostics)
+                    if diagnostics_writer:
+                        diagnostics_writer.write(result.diagnostics.to_json(path=input_path) + "\n")
+                    else:
+                        result.diagnostics.log(f"{input_path}: ")
+            elif isinstance(error, BudgetExceeded):
+                status = 'quarantined'
+                print(f"Killed {input_path}: {error}")
+                if quarantine:
+                    add_to_quarantine(quarantine, input_path, str(error))
+            else:
+                status = 'failed'
+                print(f"Error processing {input_path}: {error}")
+                traceback.print_exception(type(error), error, error.__traceback__)
+            if batch_metrics:
+                if error is None:
+                    batch_metrics.record('cached' if cached else 'converted', None if cached else result)
+                else:
+                    batch_metrics.record(status)
+            if error is not None and writer:
+                manifest.append({"source": rel_path, "error": str(error)})
+            if error is not None and report_writer:
+                report_writer.write(json.dumps({"path": input_path, "status": status, "error": str(error)},
+                                               ensure_ascii=False) + "\n")
+        finally:
+            if lease_path:
+                refresher.remove(lease_path)
+                if not complete_lease(lease_path, status):
+                    print(f"Lease of {input_path} was taken over by another worker, not marked as done")
+
+    def from_cache(input_path, output_path, lease_path, key):
+        """
+        Finishes a file from the cache. Returns False when the key is not cached.
+        """
+        if writer:
+            data = cache.read(key)
+            if data is None:
+                return False
+            result = ConversionResult(input_path, None, Diagnostics(), data)
+        elif cache.copy_to(key, output_path):
+            result = None
+        else:
+            return False
+        finish(input_path, output_path, lease_path, result, None, cached=True)
+        return True
+
+    def to_convert():
+        # Yields the files to convert, after serving cache hits. Files identical to a file being converted wait
+        # for its result in waiting (cache key -> files).
+        for input_path, output_path, lease_path in selected_files():
+            key = cache.key(input_path) if cache else None
+            if key is not None:
+                if from_cache(input_path, output_path, lease_path, key):
+                    continue
+                if key in waiting:
+                    waiting[key].append((input_path, output_path, lease_path))
+                    continue
+                waiting[key] = []
+            yield input_path, output_path, lease_path, key
+
+    def converted(input_path, output_path, lease_path, key, result, error):
+        if key is not None and error is None:
+            cache.put(key, result.data, output_path)
+        finish(input_path, output_path, lease_path, result, error)
+        for waiter in waiting.pop(key, []):
+            if error is not None or not from_cache(*waiter, key):
+                finish(*waiter, None, error)
 
+    def update_gauges(running):
+        # every file not finished and not being converted is waiting, whether submitted to the pool or not
+        if batch_metrics:
+            batch_metrics.set_queue(max(backlog["files"] - backlog["finished"] - running, 0), running)
+
+    def running_futures(pending):
+        # the pool also marks the files handed to its call queue as running, hence the bound
+        return min(sum(1 for future in pending if future.running()), jobs)
+
+    cache = None
+    if cache_dir is not None and not keep:
+        if reproducible:
+            options = {"reproducible": True, "source_date_epoch": os.environ.get(SOURCE_DATE_EPOCH_ENV)}
+            cache = ResultCache(cache_dir, options, source_date_time)
+        else:
+            cache = ResultCache(cache_dir)
+    waiting = {}
+    try:
+        update_gauges(0)
+        if jobs > 1:
+            with ProcessPoolExecutor(jobs) as executor:
+                pending = {}
+                items = to_convert()
+                while True:
+                    # bounded number of submitted files, so results do not pile up in memory; the next file is
+                    # only selected (and its lease claimed) once it can be submitted
+                    while len(pending) >= 2 * jobs:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            converted(*pending.pop(future), *future_outcome(future))
+                        update_gauges(running_futures(pending))
+                    item = next(items, None)
+                    if item is None:
+                        break
+                    input_path, output_path, _, _ = item
+                    future = executor.submit(convert_batch_file, input_path, output_path, keep, timeout=timeout,
+                                             max_memory=max_memory, reproducible=reproducible, outputs=outputs)
+                    pending[future] = item
+                    update_gauges(running_futures(pending))
+                for future in as_completed(list(pending)):
+                    converted(*pending.pop(future), *future_outcome(future))
+                    update_gauges(running_futures(pending))
+        else:
+            for item in to_convert():
+                input_path, output_path, _, _ = item
+                update_gauges(1)
                 try:
-                    convert_file(input_path, output_path, keep)
-                    print(f"Converted: {input_path} -> {output_path}")
+                    result, error = convert_batch_file(input_path, output_path, keep, timeout=timeout,
+                                                       max_memory=max_memory, reproducible=reproducible,
+                                                       outputs=outputs), None
                 except Exception as e:
-                    print(f"Error processing {input_path}: {e}")
-                    traceback.print_exc()
+                    result, error = None, e
+                converted(*item, result, error)
+                update_gauges(0)
+    finally:
+        if writer:
+            manifest.sort(key=lambda entry: entry["source"])
+            source = os.path.abspath(directory)
+            if reproducible:
+                source = os.path.basename(source)
+            index = {"version": musx2mxl.__version__, "source": source, "files": manifest}
+            writer.write("manifest.json", json.dumps(index, indent=2).encode("utf-8"))
+            writer.close()
+        if diagnostics_writer:
+            diagnostics_writer.close()
+        if report_writer:
+            report_writer.close()
+        if batch_metrics:
+            batch_metrics.set_queue(0, 0)
+            batch_metrics.stop()
+        if refresher:
+            refresher.stop()
+
+    for warning in warnings.most_common():
+        print(f"Warning {warning['code']}: {warning['count']}x in {warning['files']} files, e.g. {warning['message']}")
+
+    if preflight:
+        print("Preflight: " + ", ".join(f"{count} {status}" for status, count in sorted(sniffed.items())))
+
+
+def process_archive(archive_path, output_path=None, keep=False, reproducible=False):
+    """
+    Process all .musx files in a zip or tar archive without extracting it.
+
+    Args:
+        archive_path (str): Path to the archive with .musx files.
+        output_path (str): Directory for the .mxl files (default: archive path without extension), or the path of a
+                           new .zip or .tar archive receiving the .mxl files. The paths inside the archive are kept.
+        keep (bool): Keep the decoded Finale data and uncompressed MusicXML (only when writing to a directory).
+        reproducible (bool): See convert_file; an output archive is reproducible too (see ArchiveWriter).
+    """
+    from musx2mxl.archives import ArchiveWriter, is_archive_path, iter_archive_members, safe_member_name, \
+        strip_archive_extension
+    output_path = output_path or strip_archive_extension(archive_path)
+    writer = None
+    if is_archive_path(output_path):
+        writer = ArchiveWriter(output_path, source_date_time() if reproducible else None)
+    try:
+        for member_name, data in iter_archive_members(archive_path):
+            name = safe_member_name(member_name)
+            if name is None:
+                print(f"Skipped (unsafe path): {archive_path}:{member_name}")
+                continue
+            mxl_name = name[:-len(".musx")] + ".mxl"
+            diagnostics = Diagnostics()
+            try:
+                if writer:
+                    writer.write(mxl_name, convert_bytes(data, reproducible=reproducible, diagnostics=diagnostics))
+                    print(f"Converted: {archive_path}:{member_name} -> {output_path}:{mxl_name}")
+                else:
+                    mxl_path = os.path.join(output_path, *mxl_name.split("/"))
+                    os.makedirs(os.path.dirname(mxl_path), exist_ok=True)
+                    convert_file(BytesIO(data), mxl_path, keep, reproducible=reproducible, diagnostics=diagnostics)
+                    print(f"Converted: {archive_path}:{member_name} -> {mxl_path}")
+                diagnostics.log(f"{archive_path}:{member_name}: ")
+            except Exception as e:
+                print(f"Error processing {archive_path}:{member_name}: {e}")
+                traceback.print_exc()
+    finally:
+        if writer:
+            writer.close()
+
+
+def measures_type(value):
+    """
+    Parses a measure range: 'first-last', 'first-' (to the end) or a single measure.
+    """
+    try:
+        first, separator, last = value.partition("-")
+        first = int(first)
+        last = (int(last) if last else None) if separator else first
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid measure range '{value}', expected first-last")
+    if first < 1 or (last is not None and last < first):
+        raise argparse.ArgumentTypeError(f"invalid measure range '{value}'")
+    return first, last
+
+
+def outputs_type(value):
+    outputs = tuple(name.strip() for name in value.split(","))
+    try:
+        select_sinks(outputs)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return outputs
+
+
+def staves_type(value):
+    try:
+        staves = tuple(int(staff) for staff in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid staves '{value}', expected comma separated staff numbers")
+    return staves
 
-        if not recursive:
-            break  # Stop after processing the first directory if not recursive
+
+def shard_type(value):
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 def main():
     """
     Main function to parse arguments and process the musx file(s).
     """
+    if sys.argv[1:2] == ["catalog"]:
+        from musx2mxl.catalog import main as catalog_main
+        return catalog_main(sys.argv[2:])
+    if sys.argv[1:2] == ["inspect"]:
+        from musx2mxl.metadata import main as inspect_main
+        return inspect_main(sys.argv[2:])
     parser = argparse.ArgumentParser(description="Convert Finale .musx files to MusicXML .mxl files.")
-    parser.add_argument("input_path", help="A Finale file (*.musx) or a directory containing several Finale files.")
-    parser.add_argument("--output_path", default=None, required=False,
-                        help="Path to the output .mxl file. Default value is the same as the input_path but with extension (*.mxl) (Is ignored if input_path is a directory).")
+    parser.add_argument("input_path", nargs="?", help="A Finale file (*.musx), a directory or a zip/tar archive containing several Finale files. Use - to read from stdin.")
+    parser.add_argument("-o", "--output_path", default=None, required=False,
+                        help="Path to the output .mxl file. Default value is the same as the input_path but with extension (*.mxl) (Is ignored if input_path is a directory). Use - to write to stdout. For an archive: output directory or .zip/.tar archive.")
     parser.add_argument("--keep", action="store_true", help="Keep the decoded Finale data (*.enigmaxml) and uncompressed MuscicXml (*.musicxml).")
     parser.add_argument("--recursive", action="store_true",
                         help="Scan subdirectories recursively if input is a directory.")
+    parser.add_argument("--outputs", type=outputs_type, default=None,
+                        help=f"Outputs to write for every file, comma separated: {', '.join(SINKS)} (default: mxl). They are written next to the .mxl file, from a single conversion.")
+    parser.add_argument("--shard", type=shard_type, default=None,
+                        help="Only process shard i of N (format i/N) of a directory, selected by a hash of the file path.")
+    parser.add_argument("--lease-dir", default=None,
+                        help="Shared directory with lease files, so several workers can process the same directory without duplicate work.")
+    parser.add_argument("--lease-ttl", type=float, default=DEFAULT_LEASE_TTL,
+                        help=f"Seconds after which the lease of a crashed worker expires (default: {DEFAULT_LEASE_TTL}).")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Maximum number of seconds per file when converting a directory.")
+    parser.add_argument("--max-memory", type=int, default=None,
+                        help="Maximum resident memory in MB per file when converting a directory.")
+    parser.add_argument("--preflight", action="store_true",
+                        help="Check each file cheaply before conversion and skip files that are no valid Finale file.")
+    parser.add_argument("--quarantine", default=None,
+                        help="File listing the files that exceeded --timeout or --max-memory (JSON lines). Listed files are skipped.")
+    parser.add_argument("--diagnostics", metavar="FILE", default=None,
+                        help="Write the conversion warnings of every file to FILE (JSON lines, counted per warning code) instead of logging them.")
+    parser.add_argument("--report", metavar="FILE", default=None,
+                        help="Write a JSON line per file to FILE: input, intermediate and output sizes, time per phase, parts, measures, notes and warnings.")
+    parser.add_argument("--metrics", metavar="FILE", default=None,
+                        help="Write Prometheus metrics of a directory conversion or --watch to FILE (for the node exporter textfile collector): files converted, cached and failed, time per phase, input sizes, queue depth and files in flight.")
+    parser.add_argument("--metrics-interval", type=float, default=REFRESH_INTERVAL,
+                        help=f"Seconds between two writes of the --metrics file (default: {REFRESH_INTERVAL:g}).")
+    parser.add_argument("--profile", metavar="DIR", nargs="?", const="", default=None,
+                        help="Profile the conversion of a single file with cProfile: one .pstats file per phase and collapsed stacks for flame graphs in DIR (default: <output>.profile).")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Number of worker processes converting the files of a directory (default: 1), or the parts of --split-parts (default: number of CPUs).")
+    parser.add_argument("--output-archive", default=None,
+                        help="Collect the .mxl files of a directory into one .zip or .tar archive, with a manifest.json index.")
+    parser.add_argument("--measures", type=measures_type, default=None,
+                        help="Only convert a range of measures of a single file, e.g. 1-16 for a quick preview.")
+    parser.add_argument("--staves", type=staves_type, default=None,
+                        help="Only convert the parts of these staves of a single file (comma separated, from 1 in score order).")
+    parser.add_argument("--split-parts", action="store_true",
+                        help="Convert every part of a single file to its own .mxl file (-o: output directory).")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print statistics of the file(s) as JSON lines (measures, staves, entries, unsupported features, ...) instead of converting.")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="Make the output a pure function of the input: encoding date and zip time stamps from $SOURCE_DATE_EPOCH or the .musx file.")
+    parser.add_argument("--cache", metavar="DIR", nargs="?", const="", default=None,
+                        help="Reuse the results of earlier conversions of identical files when converting a directory (default DIR: $MUSX2MXL_CACHE or ~/.cache/musx2mxl).")
+    parser.add_argument("--measure-cache", metavar="DB", nargs="?", const="", default=None,
+                        help="Only convert the measures that changed since an earlier conversion of a single file or in --watch (default DB: measures.sqlite in $MUSX2MXL_CACHE or ~/.cache/musx2mxl).")
+    parser.add_argument("--watch", metavar="DIR", default=None,
+                        help="Watch a hot folder and convert .musx files when they are created or modified (until Ctrl+C).")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run a conversion daemon with warm worker processes. Later calls for a single file are handed to it.")
+    parser.add_argument("--socket", default=None,
+                        help="Unix socket of the conversion daemon (default: $MUSX2MXL_SOCKET or a per-user socket).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes of the conversion daemon (default: number of CPUs).")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Always convert in this process, even if a conversion daemon is running.")
+    parser.add_argument("--framed", action="store_true",
+                        help="Convert a stream of .musx files from stdin to a stream of .mxl files on stdout, each file preceded by its length (8-byte big-endian).")
 
     args = parser.parse_args()
+    if args.daemon:
+        from musx2mxl.daemon import serve
+        serve(args.socket, args.workers)
+        return 0
+    if args.framed:
+        # stdout only carries the converted documents, all messages go to stderr
+        stdout = sys.stdout.buffer
+        with redirect_stdout(sys.stderr):
+            return 1 if convert_framed(sys.stdin.buffer, stdout, args.reproducible) else 0
+    if args.watch:
+        from musx2mxl.watch import watch
+        try:
+            watch(args.watch, args.output_path, args.recursive, args.keep, args.jobs or 1, reproducible=args.reproducible,
+                  measure_cache=args.measure_cache, metrics=args.metrics, metrics_interval=args.metrics_interval)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.input_path is None:
+        parser.error("the following arguments are required: input_path")
+
     input_path = args.input_path
     output_path = args.output_path
     keep = args.keep
     recursive = args.recursive
 
-    if os.path.isdir(input_path):
-        process_directory(input_path, output_path, recursive, keep)
+    if input_path == "-" or output_path == "-":
+        stdout = sys.stdout.buffer
+        diagnostics = Diagnostics()
+        with redirect_stdout(sys.stderr):
+            try:
+                data = sys.stdin.buffer.read() if input_path == "-" else read_file(input_path)
+                mxl = convert_bytes(bytes(data), reproducible=args.reproducible, measures=args.measures,
+                                    staves=args.staves, diagnostics=diagnostics)
+            except Exception as e:
+                print(f"Error: {e}")
+                return 1
+        # the warnings go to stderr (the logger has no handler of its own), or to the --diagnostics file
+        if args.diagnostics:
+            with open(args.diagnostics, "w", encoding="utf-8") as file:
+                file.write(diagnostics.to_json(path=input_path) + "\n")
+        else:
+            diagnostics.log()
+        if output_path in (None, "-"):
+            stdout.write(mxl)
+            stdout.flush()
+        else:
+            write_file(output_path, mxl)
+        return 0
+
+    if args.stats:
+        from musx2mxl.metadata import print_stats
+        paths = list(find_musx_files(input_path, recursive)) if os.path.isdir(input_path) else [input_path]
+        return print_stats(paths, args.jobs or 1)
+
+    # a single .musx file, possibly handed to the daemon, does not load the archive modules
+    archive_input = False
+    if not input_path.endswith(".musx"):
+        from musx2mxl.archives import is_archive_path
+        archive_input = is_archive_path(input_path)
+    if args.outputs is not None and (args.output_archive or args.split_parts or archive_input):
+        parser.error("--outputs does not apply to archives and --split-parts")
+
+    if args.split_parts:
+        if not (os.path.isfile(input_path) and input_path.endswith(".musx")):
+            parser.error("--split-parts only applies to a single .musx file")
+        try:
+            for part_path in convert_parts(input_path, output_path, args.jobs, args.reproducible):
+                print(f"Converted: {input_path} -> {part_path}")
+        except Exception as e:
+            print(f"Error: {e}")
+            traceback.print_exc()
+            return 1
+        return 0
+
+    partial = args.measures is not None or args.staves is not None
+    if partial and not (os.path.isfile(input_path) and input_path.endswith(".musx")):
+        parser.error("--measures and --staves only apply to a single .musx file")
+    if args.profile is not None and not (os.path.isfile(input_path) and input_path.endswith(".musx")):
+        parser.error("--profile only applies to a single .musx file")
+
+    if os.path.isfile(input_path) and archive_input:
+        process_archive(input_path, output_path, keep, args.reproducible)
+    elif os.path.isdir(input_path):
+        from musx2mxl.archives import is_archive_path
+        if args.output_archive and not is_archive_path(args.output_archive):
+            parser.error("--output-archive must end with .zip or .tar (optionally compressed)")
+        max_memory = args.max_memory * 2 ** 20 if args.max_memory else None
+        process_directory(input_path, output_path, recursive, keep, args.shard, args.lease_dir, args.lease_ttl,
+                          args.timeout, max_memory, args.quarantine, args.preflight, args.output_archive, args.jobs or 1, args.cache,
+                          args.reproducible, args.outputs, args.diagnostics, args.report, args.metrics,
+                          args.metrics_interval)
     elif os.path.isfile(input_path) and input_path.endswith(".musx"):
         if output_path:
             assert output_path.endswith(".mxl"), "Output file must have .mxl extension"
         else:
             output_path = input_path.replace(".musx", ".mxl")
 
+        if args.preflight:
+            status = sniff(input_path)
+            if status != SNIFF_VALID:
+                print(f"Error: Invalid File ({status}): {input_path}")
+                return 1
+
         try:
-            convert_file(input_path, output_path, keep)
+            # partial, incremental and profiled conversions, other outputs and diagnostics are not handed to the daemon
+            in_process = partial or args.measure_cache is not None or args.outputs is not None or args.diagnostics \
+                or args.profile is not None or args.report
+            profile = None
+            if args.profile is not None:
+                profile = args.profile or output_path[:-len(".mxl")] + ".profile"
+            from musx2mxl.daemon import convert_via_daemon
+            if in_process or args.no_daemon or not convert_via_daemon(input_path, output_path, keep, args.socket,
+                                                                      args.reproducible):
+                result = convert_file(input_path, output_path, keep, reproducible=args.reproducible,
+                                      measures=args.measures, staves=args.staves, measure_cache=args.measure_cache,
+                                      outputs=args.outputs, profile=profile)
+                if args.diagnostics:
+                    with open(args.diagnostics, "w", encoding="utf-8") as file:
+                        file.write(result.diagnostics.to_json(path=input_path) + "\n")
+                else:
+                    result.diagnostics.log()
+                if args.report:
+                    with open(args.report, "w", encoding="utf-8") as file:
+                        file.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+                if profile:
+                    print(f"Profile: {profile}")
             print("Processing complete!")
         except Exception as e:
             print(f"Error: {e}")
             traceback.print_exc()
             return 1
     else:
-        print("Error: Input path must be a .musx file or a directory containing .musx files.")
+        print("Error: Input path must be a .musx file, or a directory or archive containing .musx files.")
         return 1
 
     return 0
@@ -1,10 +1,48 @@
+import multiprocessing
 import os
+import queue
 import tkinter as tk
-import traceback
+from concurrent.futures import ProcessPoolExecutor
 from tkinter import filedialog, ttk
 from tkinterdnd2 import DND_FILES, TkinterDnD
 from musx2mxl import convert_file
-import threading
+from musx2mxl.musx2mxl import find_musx_files
+
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+POLL_INTERVAL = 100  # ms between two updates of the queue view
+
+# rough share of each phase in the total conversion time, used to show progress per file
+PHASE_WEIGHTS = {'unzip': 0.02, 'decrypt': 0.08, 'inflate': 0.02, 'parse': 0.05, 'convert': 0.75, 'serialize': 0.04,
+                 'zip': 0.04}
+
+progress_queue = None
+
+
+def init_worker(queue_):
+    global progress_queue
+    progress_queue = queue_
+
+
+def convert_queued(item_id, file_path, output_path):
+    """
+    Converts one file of the queue in a worker process and reports the phases to the GUI.
+    """
+
+    def progress(phase, current, total):
+        progress_queue.put((item_id, phase, current, total))
+
+    convert_file(file_path, output_path, progress=progress)
+
+
+def phase_fraction(phase, current, total):
+    phase = phase.split(':')[0]  # 'convert:<part id>' phases count the measures of all parts
+    done = 0
+    for name, weight in PHASE_WEIGHTS.items():
+        if name == phase:
+            return done + weight * (current / total if total else 0)
+        done += weight
+    return done
+
 
 def main():
 
@@ -14,87 +52,193 @@ def main():
             path = "..." + path[-(max_length - 3):]  # Left trim with ellipsis
         return path
 
-    def process_file(file_path):
-        output_dir = os.path.dirname(file_path)
-        output_path = os.path.join(output_dir, os.path.basename(file_path).replace(".musx", ".mxl"))
-        try:
-            convert_file(file_path, output_path)
-            update_status(f"✔ Converted: {trim_path(output_path)}", "green")
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
-            traceback.print_exc()
-            update_status(f"❌ Error: {e}", "red")
-        finally:
-            convert_btn["state"] = "normal"
-            loading_label.pack_forget()
+    def add_paths(paths):
+        added = 0
+        invalid = 0
+        for path in paths:
+            if os.path.isdir(path):
+                for file_path in find_musx_files(path, recursive=True):
+                    added += add_file(file_path)
+            elif path.lower().endswith(".musx"):
+                added += add_file(path)
+            else:
+                invalid += 1
+        if invalid:
+            update_status(f"⚠ Added {added} file(s), ignored {invalid} invalid file(s)", "orange")
+            drop_zone.config(bg="#eda6a6", fg="black")
+        else:
+            update_status(f"✅ Added {added} file(s)", "blue")
+            drop_zone.config(bg="#dff0d8", fg="black")
+        update_buttons()
+
+    def add_file(file_path):
+        if any(item['path'] == file_path for item in items.values()):
+            return 0
+        output_path = os.path.join(os.path.dirname(file_path), os.path.basename(file_path).replace(".musx", ".mxl"))
+        item_id = file_list.insert("", tk.END, values=(trim_path(file_path), "Pending", "0%"))
+        items[item_id] = {'path': file_path, 'output_path': output_path, 'future': None, 'fraction': 0,
+                          'state': 'pending'}
+        return 1
 
     def start_conversion():
-        file_path = entry_var.get()
-        if file_path:
-            convert_btn["state"] = "disabled"
-            loading_label.pack(pady=5)
-            threading.Thread(target=process_file, args=(file_path,), daemon=True).start()
-
-    def browse_file():
-        file_path = filedialog.askopenfilename(filetypes=[("Musx Files", "*.musx")])
-        validate_file(file_path)
+        nonlocal executor
+        if executor is None:
+            executor = ProcessPoolExecutor(MAX_WORKERS, initializer=init_worker, initargs=(updates,))
+        for item_id, item in items.items():
+            if item['state'] == 'pending':
+                item['future'] = executor.submit(convert_queued, item_id, item['path'], item['output_path'])
+                item['state'] = 'queued'
+                file_list.set(item_id, "status", "Queued")
+        update_buttons()
+
+    def cancel_pending():
+        for item_id, item in items.items():
+            if item['state'] in ('pending', 'queued') and (item['future'] is None or item['future'].cancel()):
+                item['state'] = 'cancelled'
+                file_list.set(item_id, "status", "Cancelled")
+        update_buttons()
+
+    def clear_finished():
+        for item_id, item in list(items.items()):
+            if item['state'] in ('done', 'failed', 'cancelled'):
+                file_list.delete(item_id)
+                del items[item_id]
+        update_overall()
+        update_buttons()
+
+    def poll():
+        # progress from the workers
+        while True:
+            try:
+                item_id, phase, current, total = updates.get_nowait()
+            except queue.Empty:
+                break
+            item = items.get(item_id)
+            if item and item['state'] in ('queued', 'running'):
+                item['state'] = 'running'
+                item['fraction'] = phase_fraction(phase, current, total)
+                file_list.set(item_id, "status", f"Converting ({phase.split(':')[0]})")
+                file_list.set(item_id, "progress", f"{item['fraction']:.0%}")
+
+        # finished conversions
+        for item_id, item in items.items():
+            future = item['future']
+            if item['state'] in ('queued', 'running') and future.done():
+                if future.cancelled():
+                    item['state'] = 'cancelled'
+                    file_list.set(item_id, "status", "Cancelled")
+                elif future.exception() is not None:
+                    item['state'] = 'failed'
+                    print(f"Error processing {item['path']}: {future.exception()}")
+                    file_list.set(item_id, "status", f"❌ Error: {future.exception()}")
+                else:
+                    item['state'] = 'done'
+                    item['fraction'] = 1
+                    file_list.set(item_id, "status", "✔ Converted")
+                    file_list.set(item_id, "progress", "100%")
+                update_buttons()
+
+        update_overall()
+        root.after(POLL_INTERVAL, poll)
+
+    def update_overall():
+        active = [item for item in items.values() if item['state'] != 'cancelled']
+        overall_var.set(100 * sum(item['fraction'] for item in active) / len(active) if active else 0)
+        counts = {}
+        for item in items.values():
+            counts[item['state']] = counts.get(item['state'], 0) + 1
+        if counts == last_counts:
+            return  # keep the last status message until something changes
+        last_counts.clear()
+        last_counts.update(counts)
+        if counts.get('queued') or counts.get('running'):
+            update_status(f"Converting... {counts.get('done', 0)}/{len(active)} converted, "
+                          f"{counts.get('failed', 0)} failed", "orange")
+        elif counts.get('done') or counts.get('failed'):
+            color = "red" if counts.get('failed') else "green"
+            update_status(f"✔ {counts.get('done', 0)} converted, {counts.get('failed', 0)} failed", color)
+
+    def update_buttons():
+        states = [item['state'] for item in items.values()]
+        convert_btn["state"] = "normal" if 'pending' in states else "disabled"
+        cancel_btn["state"] = "normal" if 'pending' in states or 'queued' in states else "disabled"
+        clear_btn["state"] = "normal" if any(state in ('done', 'failed', 'cancelled') for state in states) \
+            else "disabled"
+
+    def browse_files():
+        file_paths = filedialog.askopenfilenames(filetypes=[("Musx Files", "*.musx")])
+        if file_paths:
+            add_paths(file_paths)
+
+    def browse_folder():
+        folder = filedialog.askdirectory()
+        if folder:
+            add_paths([folder])
 
     def on_drop(event):
-        file_path = event.data.strip('{}')  # Handle macOS extra braces
-        validate_file(file_path)
-
-    def validate_file(file_path):
-        if file_path.lower().endswith(".musx"):
-            entry_var.set(file_path)
-            entry_trimmed_var.set(trim_path(file_path))
-            convert_btn["state"] = "normal"
-            update_status("✅ File selected!", "blue")
-            drop_zone.config(bg="#dff0d8", fg="black")
-        else:
-            entry_var.set("")
-            entry_trimmed_var.set("")
-            convert_btn["state"] = "disabled"
-            update_status("⚠ Invalid file. Please select a .musx file", "orange")
-            drop_zone.config(bg="#eda6a6", fg="black")
+        add_paths(root.tk.splitlist(event.data))  # Handles paths with spaces wrapped in braces
+
+    def on_close():
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        root.destroy()
 
     def update_status(message, color):
         status_label.config(text=message, foreground=color)
 
+    items = {}
+    last_counts = {}
+    executor = None
+    updates = multiprocessing.Queue()
+
     root = TkinterDnD.Tk()
     root.title("Finale MUSX to MXL Converter")
-    root.geometry("500x250")
+    root.geometry("640x480")
     root.resizable(False, False)
+    root.protocol("WM_DELETE_WINDOW", on_close)
 
     style = ttk.Style()
     style.configure("TButton", font=("Arial", 11))
     style.configure("TLabel", font=("Arial", 10))
 
-    ttk.Label(root, text="Drag & Drop or Select a .musx File:", font=("Arial", 12, "bold")).pack(pady=10)
-
-    entry_var = tk.StringVar()
-    entry_trimmed_var = tk.StringVar()
-    entry = ttk.Entry(root, textvariable=entry_trimmed_var, width=55, state="readonly", justify="center", font=("Arial", 10))
-    entry.pack(pady=5, padx=10)
+    ttk.Label(root, text="Drag & Drop or Select .musx Files or Folders:", font=("Arial", 12, "bold")).pack(pady=10)
 
-    drop_zone = tk.Label(root, text="⬇ Drag & Drop file here ⬇", bg="#f0f0f0", fg="gray", width=50, height=3, relief="ridge", borderwidth=2)
+    drop_zone = tk.Label(root, text="⬇ Drag & Drop files or folders here ⬇", bg="#f0f0f0", fg="gray", width=60, height=3, relief="ridge", borderwidth=2)
     drop_zone.pack(pady=5)
     drop_zone.drop_target_register(DND_FILES)
     drop_zone.dnd_bind('<<Drop>>', on_drop)
 
+    file_list = ttk.Treeview(root, columns=("file", "status", "progress"), show="headings", height=10)
+    file_list.heading("file", text="File")
+    file_list.heading("status", text="Status")
+    file_list.heading("progress", text="Progress")
+    file_list.column("file", width=340)
+    file_list.column("status", width=200)
+    file_list.column("progress", width=70, anchor="e")
+    file_list.pack(pady=5, padx=10)
+
+    overall_var = tk.DoubleVar()
+    ttk.Progressbar(root, variable=overall_var, maximum=100, length=610).pack(pady=5)
+
     button_frame = ttk.Frame(root)
-    button_frame.pack(pady=10)
+    button_frame.pack(pady=5)
 
-    browse_btn = ttk.Button(button_frame, text="Browse", command=browse_file, width=10)
-    browse_btn.pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Add Files", command=browse_files, width=10).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Add Folder", command=browse_folder, width=10).pack(side=tk.LEFT, padx=5)
 
     convert_btn = ttk.Button(button_frame, text="Convert", command=start_conversion, width=10, state="disabled")
     convert_btn.pack(side=tk.LEFT, padx=5)
 
-    loading_label = ttk.Label(root, text="Converting...", foreground="orange")
+    cancel_btn = ttk.Button(button_frame, text="Cancel", command=cancel_pending, width=10, state="disabled")
+    cancel_btn.pack(side=tk.LEFT, padx=5)
+
+    clear_btn = ttk.Button(button_frame, text="Clear", command=clear_finished, width=10, state="disabled")
+    clear_btn.pack(side=tk.LEFT, padx=5)
 
     status_label = ttk.Label(root, text="", foreground="blue", anchor="center")
     status_label.pack(pady=5)
 
+    root.after(POLL_INTERVAL, poll)
     root.mainloop()
 
 if __name__ == "__main__":
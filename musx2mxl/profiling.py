@@ -0,0 +1,123 @@
+import cProfile
+import os
+import pstats
+
+PRUNE_FRACTION = 0.0001  # call paths with less of the time of their phase are folded into the caller
+MAX_STACK_DEPTH = 100
+
+
+class PhaseProfiler:
+    """
+    Profiles a conversion with cProfile, one profile per phase. The phases are the ones reported to the progress
+    callback of convert_file: unzip, decrypt, inflate, parse, convert:<part id> (one per part), serialize and zip.
+
+    Example:
+        profiler = PhaseProfiler()
+        convert_file("score.musx", "score.mxl", progress=profiler.wrap(None))
+        profiler.stop()
+        profiler.write("score.profile")
+    """
+
+    def __init__(self):
+        self.profiles = {}  # phase -> cProfile.Profile, in the order of the phases
+        self.phase = None
+
+    def wrap(self, progress=None):
+        """
+        Returns a progress callback switching the profile at every new phase, then calling progress.
+        """
+        def profiled_progress(phase, current, total):
+            if phase != self.phase:
+                self.switch(phase)
+            if progress: progress(phase, current, total)
+        return profiled_progress
+
+    def switch(self, phase):
+        if self.phase is not None:
+            self.profiles[self.phase].disable()
+        self.phase = phase
+        self.profiles.setdefault(phase, cProfile.Profile()).enable()
+
+    def stop(self):
+        if self.phase is not None:
+            self.profiles[self.phase].disable()
+            self.phase = None
+
+    def write(self, directory):
+        """
+        Writes <phase>.pstats per phase, all.pstats with all phases, and stacks.collapsed, the collapsed stacks of
+        all phases (with the phase as root frame, in microseconds) for flame graph tools.
+
+        Returns:
+            list: Paths of the written files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        all_stats = None
+        collapsed_path = os.path.join(directory, "stacks.collapsed")
+        with open(collapsed_path, "w", encoding="utf-8") as collapsed:
+            for phase, profile in self.profiles.items():
+                stats = pstats.Stats(profile)
+                path = os.path.join(directory, phase.replace(":", "-") + ".pstats")
+                stats.dump_stats(path)
+                paths.append(path)
+                for stack, microseconds in collapsed_stacks(stats.stats):
+                    collapsed.write(f"{phase};{stack} {microseconds}\n")
+                if all_stats is None:
+                    all_stats = pstats.Stats(profile)
+                else:
+                    all_stats.add(profile)
+        if all_stats is not None:
+            path = os.path.join(directory, "all.pstats")
+            all_stats.dump_stats(path)
+            paths.append(path)
+        paths.append(collapsed_path)
+        return paths
+
+
+def frame_label(func):
+    filename, line, name = func
+    label = name if filename == "~" else f"{name} ({os.path.basename(filename)}:{line})"
+    return label.replace(";", ",")
+
+
+def collapsed_stacks(stats):
+    """
+    Estimates collapsed stacks from the caller/callee times of cProfile stats: the time of a call path is split
+    among the callees in proportion to the time each caller spent in them (as gprof-style flame graph converters do).
+
+    Args:
+        stats (dict): pstats.Stats.stats.
+
+    Returns:
+        list: (stack with ';' separated frames, self time in microseconds)
+    """
+    children = {}  # caller -> {callee: cumulative time of the calls from caller}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            if caller != func:
+                children.setdefault(caller, {})[func] = cumulative
+    roots = [func for func, (_, _, _, _, callers) in stats.items()
+             if not any(caller in stats and caller != func for caller in callers)]
+    total = sum(stats[root][3] for root in roots)
+    threshold = total * PRUNE_FRACTION
+    self_times = {}
+
+    def visit(func, path, on_path, seconds):
+        path = path + (frame_label(func),)
+        on_path = on_path | {func}
+        func_total = stats[func][3]
+        spent = 0.0
+        if func_total > 0 and len(path) < MAX_STACK_DEPTH:
+            for child, cumulative in children.get(func, {}).items():
+                child_seconds = cumulative * seconds / func_total
+                if child in on_path or child_seconds < threshold:
+                    continue
+                spent += child_seconds
+                visit(child, path, on_path, child_seconds)
+        stack = ";".join(path)
+        self_times[stack] = self_times.get(stack, 0.0) + max(seconds - spent, 0.0)
+
+    for root in roots:
+        visit(root, (), frozenset(), stats[root][3])
+    return [(stack, round(seconds * 1e6)) for stack, seconds in self_times.items() if round(seconds * 1e6) > 0]
@@ -0,0 +1,53 @@
+import time
+
+import musx2mxl
+
+
+class ConversionResult:
+    """
+    Outcome of the conversion of one file by convert_file.
+    """
+
+    def __init__(self, input_path, output_path, diagnostics, data=None):
+        self.input_path = input_path if isinstance(input_path, str) else None
+        self.output_path = output_path if isinstance(output_path, str) else None
+        self.diagnostics = diagnostics  # Diagnostics with the warnings of the conversion
+        self.data = data  # content of the .mxl file, when converted in memory
+        self.sizes = {}  # bytes: input, score_dat (encrypted and decrypted), enigmaxml (inflated), musicxml, output
+        self.timings = {}  # seconds per phase: unzip, decrypt, inflate, parse, convert (all parts), serialize, zip
+        self.counts = {}  # parts, measures (per part) and notes of the MusicXML
+
+    def to_dict(self):
+        return {"path": self.input_path, "output": self.output_path, "version": musx2mxl.__version__,
+                "sizes": self.sizes, "timings": self.timings, "total": round(sum(self.timings.values()), 6),
+                "counts": self.counts, "warnings": self.diagnostics.most_common()}
+
+
+class PhaseTimer:
+    """
+    Measures the time spent in every phase reported to the progress callback of convert_file. The phases
+    convert:<part id> are added up as convert.
+    """
+
+    def __init__(self, timings):
+        self.timings = timings
+        self.phase = None
+        self.started = None
+
+    def wrap(self, progress=None):
+        def timed_progress(phase, current, total):
+            timed_phase = phase.split(":")[0]
+            if timed_phase != self.phase:
+                self.switch(timed_phase)
+            if progress: progress(phase, current, total)
+        return timed_progress
+
+    def switch(self, phase):
+        now = time.perf_counter()
+        if self.phase is not None:
+            self.timings[self.phase] = round(self.timings.get(self.phase, 0.0) + now - self.started, 6)
+        self.phase = phase
+        self.started = now
+
+    def stop(self):
+        self.switch(None)
@@ -0,0 +1,275 @@
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import TimeoutError
+from urllib.parse import urlparse, parse_qs
+
+import musx2mxl
+from musx2mxl.workers import WorkerTimeout, create_pool, convert_bytes_task
+
+DEFAULT_PORT = 8000
+DEFAULT_QUEUE_SIZE = 16  # requests waiting for a worker, on top of the requests being converted
+DEFAULT_MAX_UPLOAD = 50  # MB
+DEFAULT_TIMEOUT = 120  # seconds
+RETRY_AFTER = 5  # seconds, sent with 503 responses when the queue is full
+READ_TIMEOUT = 30  # seconds a client may stay silent while sending its request
+UPLOAD_TIMEOUT = 120  # seconds to receive the whole body of a request
+READ_CHUNK_SIZE = 2 ** 16
+
+
+class ConversionHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers=None, queue_size=DEFAULT_QUEUE_SIZE, max_upload=DEFAULT_MAX_UPLOAD * 2 ** 20,
+                 timeout=DEFAULT_TIMEOUT):
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = self.workers + queue_size
+        # a slot is taken from admission until the worker has finished, so a timed out request keeps its slot
+        # until its worker is done or killed
+        self.free_slots = list(range(self.capacity))
+        self.busy_slots = set()
+        self.task_pids = multiprocessing.Array('l', self.capacity, lock=False)  # see convert_bytes_task
+        self.pool = create_pool(self.workers, self.task_pids)
+        self.max_upload = max_upload
+        self.conversion_timeout = timeout
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.responses = {}  # status code -> count
+        self.conversion_seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        super().__init__(address, ConversionRequestHandler)
+
+    def count_response(self, status):
+        with self.lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    def acquire_slot(self):
+        """
+        Returns a free slot, or None when all workers are busy and the queue is full.
+        """
+        with self.lock:
+            if not self.free_slots:
+                return None
+            slot = self.free_slots.pop()
+            self.busy_slots.add(slot)
+            self.in_flight += 1
+            return slot
+
+    def release_slot(self, slot):
+        # called by the pool when the task is done, or by the handler when it killed the worker, whichever is first
+        with self.lock:
+            if slot not in self.busy_slots:
+                return
+            self.busy_slots.remove(slot)
+            self.free_slots.append(slot)
+            self.in_flight -= 1
+
+    def kill_task(self, slot):
+        """
+        Kills the worker running the task of a slot, when the alarm of convert_bytes_task did not stop it (a worker
+        stuck in C code). The pool replaces the worker; the task never reports back, so its slot is released here.
+
+        Returns:
+            bool: False when the task is not running (still waiting for a worker).
+        """
+        pid = self.task_pids[slot]
+        if not pid:
+            return False
+        self.task_pids[slot] = 0
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.release_slot(slot)
+        return True
+
+    def server_close(self):
+        super().server_close()
+        self.pool.terminate()
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /convert  Body: content of a .musx file. Response: content of the .mxl file.
+    GET /health    Liveness and capacity as JSON.
+    GET /metrics   Counters in Prometheus text format.
+    """
+    timeout = READ_TIMEOUT  # socket timeout of the connection, see StreamRequestHandler
+    server_version = "musx2mxl/" + musx2mxl.__version__
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            with self.server.lock:
+                health = {"status": "ok", "version": musx2mxl.__version__, "workers": self.server.workers,
+                          "capacity": self.server.capacity, "in_flight": self.server.in_flight}
+            self.send_body(200, json.dumps(health).encode("utf-8"), "application/json")
+        elif path == "/metrics":
+            self.send_body(200, self.format_metrics().encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self.send_error_body(404, "Not found")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/convert":
+            self.send_error_body(404, "Not found")
+            return
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self.send_error_body(411, "Content-Length required")
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error_body(400, "Invalid Content-Length")
+            return
+        if length > self.server.max_upload:
+            self.send_error_body(413, f"Upload exceeds {self.server.max_upload // 2 ** 20} MB")
+            return
+        # the body is read before a slot is taken, so slow or stalled uploads never hold a worker
+        try:
+            data = self.read_body(length)
+        except socket.timeout:
+            self.close_connection = True
+            self.send_error_body(408, "Upload timed out")
+            return
+        except ConnectionError:
+            self.close_connection = True
+            return
+        slot = self.server.acquire_slot()
+        if slot is None:
+            self.send_error_body(503, "Conversion queue is full", {"Retry-After": str(RETRY_AFTER)})
+            return
+
+        start = time.monotonic()
+        release = lambda _: self.server.release_slot(slot)
+        result = self.server.pool.apply_async(convert_bytes_task, (data, self.server.conversion_timeout, slot),
+                                              callback=release, error_callback=release)
+        try:
+            mxl, error, diagnostics = result.get(self.server.conversion_timeout + 5)
+        except TimeoutError:
+            self.server.kill_task(slot)
+            self.send_error_body(504, "Conversion timed out")
+            return
+        except WorkerTimeout:
+            self.send_error_body(504, "Conversion timed out")
+            return
+        with self.server.lock:
+            self.server.conversion_seconds += time.monotonic() - start
+            self.server.bytes_in += length
+        if error:
+            self.send_error_body(422, error)
+            return
+
+        name = parse_qs(url.query).get("name", ["score.musx"])[0]
+        diagnostics.log(f"{name}: ")
+        filename = os.path.basename(name).replace(".musx", "") + ".mxl"
+        with self.server.lock:
+            self.server.bytes_out += len(mxl)
+        self.send_body(200, mxl, "application/vnd.recordare.musicxml",
+                       {"Content-Disposition": f'attachment; filename="{filename}"'})
+
+    def read_body(self, length):
+        """
+        Reads the request body within UPLOAD_TIMEOUT seconds.
+
+        Raises:
+            socket.timeout: When the client sends too slowly or stops sending.
+            ConnectionError: When the client closes the connection before the end of the body.
+        """
+        deadline = time.monotonic() + UPLOAD_TIMEOUT
+        body = bytearray()
+        while len(body) < length:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("Upload timed out")
+            self.connection.settimeout(min(remaining, self.timeout))
+            chunk = self.rfile.read1(min(length - len(body), READ_CHUNK_SIZE))
+            if not chunk:
+                raise ConnectionError("Connection closed during the upload")
+            body += chunk
+        self.connection.settimeout(self.timeout)
+        return bytes(body)
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.server.count_response(status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_body(self, status, message, headers=None):
+        self.send_body(status, json.dumps({"error": message}).encode("utf-8"), "application/json", headers)
+
+    def format_metrics(self):
+        server = self.server
+        with server.lock:
+            lines = [
+                "# TYPE musx2mxl_http_responses_total counter",
+                *(f'musx2mxl_http_responses_total{{code="{status}"}} {count}'
+                  for status, count in sorted(server.responses.items())),
+                "# TYPE musx2mxl_in_flight gauge",
+                f"musx2mxl_in_flight {server.in_flight}",
+                "# TYPE musx2mxl_capacity gauge",
+                f"musx2mxl_capacity {server.capacity}",
+                "# TYPE musx2mxl_workers gauge",
+                f"musx2mxl_workers {server.workers}",
+                "# TYPE musx2mxl_conversion_seconds_total counter",
+                f"musx2mxl_conversion_seconds_total {server.conversion_seconds:.6f}",
+                "# TYPE musx2mxl_input_bytes_total counter",
+                f"musx2mxl_input_bytes_total {server.bytes_in}",
+                "# TYPE musx2mxl_output_bytes_total counter",
+                f"musx2mxl_output_bytes_total {server.bytes_out}",
+                "# TYPE musx2mxl_uptime_seconds gauge",
+                f"musx2mxl_uptime_seconds {time.time() - server.started:.0f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+
+def main():
+    """
+    Runs a local HTTP conversion service.
+    """
+    parser = argparse.ArgumentParser(description="Local HTTP service converting Finale .musx files to MusicXML .mxl files.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs).")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Number of requests that can wait for a worker before 503 is returned (default: {DEFAULT_QUEUE_SIZE}).")
+    parser.add_argument("--max-upload", type=int, default=DEFAULT_MAX_UPLOAD,
+                        help=f"Maximum upload size in MB (default: {DEFAULT_MAX_UPLOAD}).")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Maximum number of seconds per conversion (default: {DEFAULT_TIMEOUT}).")
+    args = parser.parse_args()
+
+    server = ConversionHTTPServer((args.host, args.port), args.workers, args.queue_size, args.max_upload * 2 ** 20,
+                                  args.timeout)
+    print(f"Conversion service listening on http://{args.host}:{args.port}/convert")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
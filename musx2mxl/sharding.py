@@ -0,0 +1,203 @@
+import hashlib
+import os
+import socket
+import threading
+import time
+
+DEFAULT_LEASE_TTL = 3600  # seconds before a lease of a crashed worker may be taken over
+
+
+def parse_shard(value):
+    """
+    Parses a shard specification of the form 'i/N'.
+
+    Args:
+        value (str): Shard specification, with 0 <= i < N.
+
+    Returns:
+        tuple: (index, count)
+    """
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}': expected format i/N")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{value}': index must be in range 0..{count - 1}")
+    return index, count
+
+
+def path_key(rel_path):
+    """
+    Returns a stable key for a path relative to the batch root.
+    The key does not depend on the machine, the mount point or the Python hash seed.
+    """
+    return hashlib.sha1(rel_path.replace(os.sep, '/').encode('utf-8')).hexdigest()
+
+
+def in_shard(rel_path, shard):
+    index, count = shard
+    return int(path_key(rel_path), 16) % count == index
+
+
+def claim_lease(lease_dir, rel_path, ttl=DEFAULT_LEASE_TTL):
+    """
+    Atomically claims a file of the batch for this worker.
+
+    A lease is a file created with O_EXCL in a directory shared by all workers, starting with the owner (see
+    lease_owner). Once a file is processed the lease is renamed to a '.done' marker, so no other worker picks it
+    up again. The owner refreshes its leases (see LeaseRefresher); leases not refreshed within ttl seconds are
+    considered abandoned (crashed worker) and can be taken over.
+
+    Args:
+        lease_dir (str): Directory shared by all workers.
+        rel_path (str): Path of the input file relative to the batch root.
+        ttl (float): Lease lifetime in seconds.
+
+    Returns:
+        str: Path of the lease file, or None if the file is already claimed or done.
+    """
+    key = path_key(rel_path)
+    lease_path = os.path.join(lease_dir, key + '.lease')
+    done_path = os.path.join(lease_dir, key + '.done')
+    if os.path.exists(done_path):
+        return None
+
+    for _ in range(2):
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            if not break_stale_lease(lease_path, ttl):
+                return None
+            continue
+        with os.fdopen(fd, 'w') as file:
+            file.write(f"{lease_owner()} {rel_path}\n")
+        if os.path.exists(done_path):
+            # finished by another worker between our first check and the claim
+            os.remove(lease_path)
+            return None
+        return lease_path
+    return None
+
+
+def break_stale_lease(lease_path, ttl):
+    """
+    Removes a lease that has not been refreshed within ttl seconds.
+
+    Returns:
+        bool: True if the lease was stale and has been removed.
+    """
+    try:
+        if time.time() - os.stat(lease_path).st_mtime < ttl:
+            return False
+        # rename first: only one worker can win the rename of the same lease
+        stale_path = f"{lease_path}.{socket.gethostname()}.{os.getpid()}.stale"
+        os.rename(lease_path, stale_path)
+    except FileNotFoundError:
+        return True  # released meanwhile, try to claim it
+    if time.time() - os.stat(stale_path).st_mtime < ttl:
+        # another worker took over the stale lease just before our rename, give it back
+        try:
+            os.link(stale_path, lease_path)
+        except FileExistsError:
+            pass
+        os.remove(stale_path)
+        return False
+    os.remove(stale_path)
+    return True
+
+
+def lease_owner():
+    return f"{socket.gethostname()} {os.getpid()}"
+
+
+def owns_lease(lease_path):
+    """
+    Returns True if the lease exists and was claimed by this process (not taken over by another worker).
+    """
+    try:
+        with open(lease_path) as file:
+            return file.readline().startswith(lease_owner() + " ")
+    except FileNotFoundError:
+        return False
+
+
+def refresh_lease(lease_path):
+    """
+    Renews a lease of this process, so it is not taken over as stale.
+
+    Returns:
+        bool: False when the lease was lost (taken over or removed).
+    """
+    if not owns_lease(lease_path):
+        return False
+    try:
+        os.utime(lease_path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def complete_lease(lease_path, status='ok'):
+    """
+    Marks the leased file as processed so no worker will pick it up again.
+
+    Returns:
+        bool: False when the lease was lost to another worker, whose lease is left alone.
+    """
+    if not owns_lease(lease_path):
+        return False
+    with open(lease_path, 'a') as file:
+        file.write(f"{status}\n")
+    os.replace(lease_path, lease_path[:-len('.lease')] + '.done')
+    return True
+
+
+class LeaseRefresher:
+    """
+    Refreshes the leases held by this process every ttl / 3 seconds in a background thread, while their files
+    wait for a worker or are converted.
+
+    Example:
+        refresher = LeaseRefresher(ttl).start()
+        refresher.add(lease_path)
+        ...
+        refresher.remove(lease_path)
+        refresher.stop()
+    """
+
+    def __init__(self, ttl=DEFAULT_LEASE_TTL):
+        self.interval = ttl / 3
+        self.leases = set()
+        self.lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add(self, lease_path):
+        with self.lock:
+            self.leases.add(lease_path)
+
+    def remove(self, lease_path):
+        with self.lock:
+            self.leases.discard(lease_path)
+
+    def refresh(self):
+        with self.lock:
+            leases = list(self.leases)
+        for lease_path in leases:
+            if not refresh_lease(lease_path):
+                print(f"Lost lease {lease_path}: taken over by another worker")
+                self.remove(lease_path)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.refresh()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
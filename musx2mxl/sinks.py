@@ -0,0 +1,103 @@
+import json
+
+DEFAULT_OUTPUTS = ('mxl',)
+KEEP_OUTPUTS = ('enigmaxml', 'musicxml')  # written in addition with keep
+
+SINKS = {}  # name -> (file extension, write function, needs the MusicXML)
+
+
+class SinkInput:
+    """
+    What the sinks of one conversion write from: the decoded Finale data and, once converted, the serialized
+    MusicXML. Sinks read these buffers, they never copy or modify them.
+    """
+
+    def __init__(self, input_path, enigmaxml, date_time=None):
+        self.input_path = input_path
+        self.enigmaxml = enigmaxml  # bytes
+        self.musicxml = None  # BytesIO, set after the conversion
+        self.date_time = date_time  # zip time stamp of reproducible output, see save_as_mxl
+
+
+def register_sink(name, extension, write, needs_musicxml=True):
+    """
+    Adds an output format.
+
+    Args:
+        name (str): Name used in outputs (and --outputs).
+        extension (str): Replaces .mxl in the output path.
+        write: Function write(path, source) writing a SinkInput to path.
+        needs_musicxml (bool): False for sinks of the decoded data only. They are written before the conversion
+                               (so also when it fails), and without other sinks the conversion is skipped.
+    """
+    SINKS[name] = (extension, write, needs_musicxml)
+
+
+def select_sinks(outputs=None, keep=False):
+    """
+    Returns the names of the sinks to write, in registration order.
+    """
+    names = set(outputs or DEFAULT_OUTPUTS)
+    if keep:
+        names.update(KEEP_OUTPUTS)
+    unknown = names - SINKS.keys()
+    if unknown:
+        raise ValueError(f"Unknown output {', '.join(sorted(unknown))}, choose from {', '.join(SINKS)}")
+    return [name for name in SINKS if name in names]
+
+
+def needs_conversion(names):
+    return any(SINKS[name][2] for name in names)
+
+
+def sink_path(output_path, name):
+    """
+    Returns the output path of a sink: the .mxl path, or for other sinks that path with the extension of the sink.
+    """
+    if name == 'mxl':
+        return output_path
+    if not isinstance(output_path, str):
+        raise ValueError(f"The {name} output needs an output path, not a file object")
+    stem = output_path[:-len(".mxl")] if output_path.endswith(".mxl") else output_path
+    return stem + SINKS[name][0]
+
+
+def write_sinks(names, output_path, source, after_conversion=True):
+    """
+    Writes the sinks that need the MusicXML (after_conversion) or only the decoded data (not after_conversion).
+    """
+    for name in names:
+        _, write, needs_musicxml = SINKS[name]
+        if needs_musicxml == after_conversion:
+            write(sink_path(output_path, name), source)
+
+
+def write_mxl(path, source):
+    # imported on use: musx2mxl.musx2mxl imports this module
+    from musx2mxl.musx2mxl import save_as_mxl
+    save_as_mxl(source.musicxml, path, date_time=source.date_time)
+
+
+def write_musicxml(path, source):
+    with open(path, "wb") as file, source.musicxml.getbuffer() as view:
+        file.write(view)
+
+
+def write_enigmaxml(path, source):
+    with open(path, "wb") as file:
+        file.write(source.enigmaxml)
+
+
+def write_stats(path, source):
+    from musx2mxl.metadata import scan_score
+    stats = scan_score(source.enigmaxml)
+    if isinstance(source.input_path, str):
+        stats = dict({"path": source.input_path}, **stats)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(stats, file, ensure_ascii=False)
+
+
+register_sink('mxl', '.mxl', write_mxl)
+register_sink('musicxml', '.musicxml', write_musicxml)
+register_sink('enigmaxml', '.enigmaxml', write_enigmaxml, needs_musicxml=False)
+register_sink('stats', '.stats.json', write_stats, needs_musicxml=False)
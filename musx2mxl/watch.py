@@ -0,0 +1,241 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from musx2mxl.metrics import REFRESH_INTERVAL, BatchMetrics
+
+DEBOUNCE = 2.0  # seconds without changes before a file is considered completely written
+POLL_INTERVAL = 2.0  # seconds between two scans when inotify is not available
+RESULT_INTERVAL = 0.5  # seconds between two checks for finished conversions
+HASH_CHUNK_SIZE = 2 ** 20
+
+# inotify event masks (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (followed by the name)
+
+
+class InotifyWatcher:
+    """
+    Reports created and modified .musx files with Linux inotify.
+    """
+
+    def __init__(self, directory, recursive=False):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.libc = libc
+        self.directory = directory
+        self.recursive = recursive
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # watch descriptor -> directory
+        self.add_watch(directory)
+        if recursive:
+            for root, dirs, _ in os.walk(directory):
+                for name in dirs:
+                    self.add_watch(os.path.join(root, name))
+
+    def add_watch(self, directory):
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+        self.watches[wd] = directory
+
+    def changes(self, timeout):
+        """
+        Waits up to timeout seconds for changes and returns the set of changed .musx paths.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        buffer = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # events were lost: report everything, unchanged files are skipped by their hash
+                changed.update(scan(self.directory, self.recursive))
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_watch(path)
+                    changed.update(scan(path, True))
+            elif name.endswith(".musx"):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Reports created and modified .musx files by comparing the size and modification time of all files every
+    POLL_INTERVAL seconds.
+    """
+
+    def __init__(self, directory, recursive=False):
+        self.directory = directory
+        self.recursive = recursive
+        self.snapshot = scan(directory, recursive)
+
+    def changes(self, timeout):
+        time.sleep(min(timeout, POLL_INTERVAL))
+        snapshot = scan(self.directory, self.recursive)
+        changed = {path for path, stat in snapshot.items() if self.snapshot.get(path) != stat}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def scan(directory, recursive=False):
+    """
+    Returns (modification time, size) of all .musx files in a directory.
+    """
+    files = {}
+    for root, dirs, names in os.walk(directory):
+        for name in names:
+            if name.endswith(".musx"):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+        if not recursive:
+            break
+    return files
+
+
+def create_watcher(directory, recursive=False):
+    """
+    Returns an inotify watcher, or a polling watcher where inotify is not available.
+    """
+    try:
+        return InotifyWatcher(directory, recursive)
+    except (OSError, AttributeError):
+        return PollingWatcher(directory, recursive)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def watch(directory, output_dir=None, recursive=False, keep=False, jobs=1, debounce=DEBOUNCE, reproducible=False,
+          measure_cache=None, metrics=None, metrics_interval=REFRESH_INTERVAL):
+    """
+    Converts the .musx files of a hot folder whenever they are created or modified, until interrupted (Ctrl+C).
+
+    Files missing an up-to-date .mxl file are converted on start. A file is converted once it has not changed for
+    debounce seconds, and only if its content differs from the last conversion.
+
+    Args:
+        directory (str): Directory to watch.
+        output_dir (str): Directory for the .mxl files (default: next to the .musx files).
+        recursive (bool): Also watch subdirectories.
+        keep (bool): Keep the decoded Finale data and uncompressed MusicXML.
+        jobs (int): Number of worker processes.
+        debounce (float): Seconds without changes before a file is converted.
+        reproducible (bool): See convert_file.
+        measure_cache (str): Path of a MeasureCache database ('' for the default), so a modified file only has its
+                             changed measures converted again.
+        metrics (str): Path of a Prometheus textfile refreshed every metrics_interval seconds (see BatchMetrics).
+                       Files touched with an unchanged content are counted as cached.
+        metrics_interval (float): Seconds between two writes of the metrics file.
+    """
+    from musx2mxl.musx2mxl import convert_batch_file, future_outcome
+
+    def output_for(input_path):
+        return os.path.join(output_dir or os.path.dirname(input_path),
+                            os.path.basename(input_path).replace(".musx", ".mxl"))
+
+    watcher = create_watcher(directory, recursive)
+    print(f"Watching {directory} ({'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'})")
+    hashes = {}  # input path -> content hash of the last conversion
+    pending = {}  # input path -> time of the last change
+    running = {}  # future -> (input path, content hash)
+    for input_path, (mtime_ns, _) in scan(directory, recursive).items():
+        output_path = output_for(input_path)
+        if os.path.exists(output_path) and os.stat(output_path).st_mtime_ns >= mtime_ns:
+            hashes[input_path] = file_hash(input_path)
+        else:
+            pending[input_path] = 0.0
+
+    batch_metrics = BatchMetrics(metrics, metrics_interval).start() if metrics else None
+    executor = ProcessPoolExecutor(jobs)
+    try:
+        while True:
+            timeout = POLL_INTERVAL
+            if pending:
+                timeout = max(0.1, min(pending.values()) + debounce - time.monotonic())
+            if running:
+                timeout = min(timeout, RESULT_INTERVAL)
+            changed = watcher.changes(timeout)
+            now = time.monotonic()
+            for input_path in changed:
+                pending[input_path] = now
+
+            for future in [future for future in running if future.done()]:
+                input_path, digest = running.pop(future)
+                result, error = future_outcome(future)
+                hashes[input_path] = digest  # a file that fails is not retried until it changes
+                if error is None:
+                    print(f"Converted: {input_path} -> {output_for(input_path)}")
+                    result.diagnostics.log(f"{input_path}: ")
+                else:
+                    print(f"Error processing {input_path}: {error}")
+                if batch_metrics:
+                    batch_metrics.record('converted' if error is None else 'failed', result)
+
+            now = time.monotonic()
+            busy = {input_path for input_path, _ in running.values()}
+            for input_path, changed in sorted(pending.items(), key=lambda item: item[1]):
+                if len(running) >= jobs:
+                    break
+                if now - changed < debounce or input_path in busy:
+                    continue
+                del pending[input_path]
+                try:
+                    digest = file_hash(input_path)
+                except FileNotFoundError:
+                    continue
+                if hashes.get(input_path) == digest:
+                    if batch_metrics:
+                        batch_metrics.record('cached')
+                    continue  # touched, but the content is unchanged
+                future = executor.submit(convert_batch_file, input_path, output_for(input_path), keep,
+                                         reproducible=reproducible, measure_cache=measure_cache)
+                running[future] = (input_path, digest)
+            if batch_metrics:
+                batch_metrics.set_queue(len(pending), len(running))
+    finally:
+        watcher.close()
+        executor.shutdown(cancel_futures=True)
+        if batch_metrics:
+            batch_metrics.stop()
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import signal
+
+task_pids = None  # shared array: pid of the worker running the task of each slot (0: not running), see create_pool
+
+
+class WorkerTimeout(Exception):
+    pass
+
+
+def warm_up():
+    """
+    Loads everything a conversion needs (lxml, the instrument table, the chord patterns), so the first
+    conversion in a worker process does not pay for it.
+    """
+    from musx2mxl import converter, helper  # noqa: F401
+    helper.translate_chord_suffix("maj7")
+
+
+def init_worker(pids=None):
+    global task_pids
+    task_pids = pids
+    warm_up()
+
+
+def create_pool(processes=None, pids=None):
+    """
+    Creates a pool of warm worker processes.
+
+    Args:
+        processes (int): Number of worker processes (default: number of CPUs).
+        pids: Shared multiprocessing.Array, in which convert_bytes_task records the pid of the worker running the
+              task of a slot, so a worker stuck in a task can be killed (the pool then starts a new one).
+    """
+    warm_up()  # forked workers inherit the loaded modules
+    return multiprocessing.Pool(processes, initializer=init_worker, initargs=(pids,))
+
+
+def convert_task(input_path, output_path, keep=False, reproducible=False):
+    """
+    Converts a file in a worker process.
+
+    Returns:
+        str: The error message, or None when the file was converted.
+    """
+    from musx2mxl.musx2mxl import convert_file
+    try:
+        result = convert_file(input_path, output_path, keep, reproducible=reproducible)
+    except Exception as e:
+        return str(e)
+    result.diagnostics.log(f"{input_path}: ")
+    return None
+
+
+def raise_timeout(signum, frame):
+    raise WorkerTimeout("Conversion timed out")
+
+
+def convert_bytes_task(data, timeout=None, slot=None):
+    """
+    Converts the content of a .musx file in a worker process, interrupting it after timeout seconds
+    (on platforms with SIGALRM), so a pathological file does not block the worker. The alarm is only handled
+    between Python bytecodes; with a slot, the pid of the worker is recorded in task_pids meanwhile, so it can be
+    killed when the alarm does not get through.
+
+    Returns:
+        tuple: (content of the .mxl file, None, Diagnostics with the warnings) or (None, error message, None).
+
+    Raises:
+        WorkerTimeout: When the conversion took longer than timeout seconds.
+    """
+    from musx2mxl.diagnostics import Diagnostics
+    from musx2mxl.musx2mxl import convert_bytes
+    if slot is not None and task_pids is not None:
+        task_pids[slot] = os.getpid()
+    use_alarm = timeout and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    diagnostics = Diagnostics()
+    try:
+        return convert_bytes(data, diagnostics=diagnostics), None, diagnostics
+    except WorkerTimeout:
+        raise
+    except Exception as e:
+        return None, str(e), None
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if slot is not None and task_pids is not None:
+            task_pids[slot] = 0
@@ -31,6 +31,7 @@ setup(
         "console_scripts": [
             "musx2mxl=musx2mxl.musx2mxl:main",  # Creates a CLI command
             "musx2mxl-gui=musx2mxl.musx2mxl_gui:main",  # Creates a CLI command
+            "musx2mxl-serve=musx2mxl.server:main",  # Creates a CLI command
         ],
     },
     classifiers=[
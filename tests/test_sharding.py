@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+import unittest
+
+from musx2mxl.sharding import LeaseRefresher, claim_lease, complete_lease, lease_owner, path_key, refresh_lease
+
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+class LeaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.lease_dir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def foreign_lease(self, rel_path, seconds_old=0):
+        # a lease of a worker on another machine
+        lease_path = os.path.join(self.lease_dir, path_key(rel_path) + '.lease')
+        with open(lease_path, 'w') as file:
+            file.write(f"otherhost 1 {rel_path}\n")
+        age(lease_path, seconds_old)
+        return lease_path
+
+    def test_claim(self):
+        lease_path = claim_lease(self.lease_dir, 'a/score.musx', ttl=60)
+        self.assertIsNotNone(lease_path)
+        with open(lease_path) as file:
+            self.assertEqual(file.readline(), f"{lease_owner()} a/score.musx\n")
+        self.assertIsNone(claim_lease(self.lease_dir, 'a/score.musx', ttl=60))
+        self.assertIsNotNone(claim_lease(self.lease_dir, 'b/score.musx', ttl=60))
+
+    def test_live_lease_is_not_taken_over(self):
+        self.foreign_lease('score.musx', seconds_old=30)
+        self.assertIsNone(claim_lease(self.lease_dir, 'score.musx', ttl=60))
+
+    def test_stale_lease_is_taken_over(self):
+        lease_path = self.foreign_lease('score.musx', seconds_old=120)
+        self.assertEqual(claim_lease(self.lease_dir, 'score.musx', ttl=60), lease_path)
+        with open(lease_path) as file:
+            self.assertTrue(file.readline().startswith(lease_owner() + " "))
+        self.assertEqual([name for name in os.listdir(self.lease_dir) if name.endswith('.stale')], [])
+
+    def test_refreshed_lease_is_not_taken_over(self):
+        lease_path = claim_lease(self.lease_dir, 'score.musx', ttl=60)
+        age(lease_path, 120)
+        self.assertTrue(refresh_lease(lease_path))
+        self.assertLess(time.time() - os.stat(lease_path).st_mtime, 60)
+
+    def test_refresher(self):
+        lease_path = claim_lease(self.lease_dir, 'score.musx', ttl=60)
+        age(lease_path, 120)
+        refresher = LeaseRefresher(ttl=60)
+        refresher.add(lease_path)
+        refresher.refresh()
+        self.assertLess(time.time() - os.stat(lease_path).st_mtime, 60)
+        refresher.remove(lease_path)
+        age(lease_path, 120)
+        refresher.refresh()
+        self.assertGreater(time.time() - os.stat(lease_path).st_mtime, 60)
+
+    def test_done(self):
+        lease_path = claim_lease(self.lease_dir, 'score.musx', ttl=60)
+        self.assertTrue(complete_lease(lease_path, 'failed'))
+        self.assertFalse(os.path.exists(lease_path))
+        with open(lease_path[:-len('.lease')] + '.done') as file:
+            self.assertEqual(file.read().splitlines()[-1], 'failed')
+        self.assertIsNone(claim_lease(self.lease_dir, 'score.musx', ttl=60))
+
+    def test_lost_lease_is_not_completed(self):
+        lease_path = claim_lease(self.lease_dir, 'score.musx', ttl=60)
+        os.remove(lease_path)
+        self.foreign_lease('score.musx')  # taken over while this worker was converting
+        self.assertFalse(refresh_lease(lease_path))
+        self.assertFalse(complete_lease(lease_path))
+        with open(lease_path) as file:
+            self.assertEqual(file.read(), "otherhost 1 score.musx\n")
+        self.assertFalse(os.path.exists(lease_path[:-len('.lease')] + '.done'))
+
+
+if __name__ == '__main__':
+    unittest.main()